@@ -0,0 +1,36 @@
+"""
+Recalcula as estatísticas diárias a partir de ``clientes`` e ``contratos``.
+
+Uso (no diretório backend):
+    python -m app.commands.recalcular_estatisticas
+
+Recalcula ``contratos.plano_valor_centavos`` onde estiver vazio ou
+divergente de ``plano_valor`` e recria as tabelas ``estatisticas_*_diarias``
+em uma única transação. Útil após a primeira implantação ou para corrigir
+divergências.
+"""
+import logging
+
+from app.logging_config import configurar_logging
+from app.database import Base, engine
+from app.services.stats_service import estatisticas
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    configurar_logging()
+    Base.metadata.create_all(bind=engine)
+    estatisticas.criar(engine)
+
+    with engine.begin() as connection:
+        resultado = estatisticas.reconstruir(connection)
+
+    logger.info(
+        "📊 Estatísticas recalculadas: %s linhas de cadastros, %s de contratos (%s valores convertidos)",
+        resultado["cadastros"], resultado["contratos"], resultado["contratos_atualizados"],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Regera os PDFs dos contratos existentes (ex.: após mudança no modelo do contrato).
+
+Uso (no diretório backend):
+    python -m app.commands.rerenderizar_contratos [--workers N] [--taxa-maxima N] [--recomecar]
+
+Os contratos são lidos do banco em lotes ordenados por id e renderizados
+no pool de processos (app.services.render_pool), com no máximo
+--taxa-maxima contratos enviados ao pool por segundo, para não disputar
+CPU e disco com a API. Ao fim de cada lote o
+último id concluído é gravado no arquivo de checkpoint; se o comando for
+interrompido, a próxima execução continua a partir dele (o checkpoint é
+apagado quando o comando termina). Versões pré-comprimidas (.br/.gz) dos
+PDFs regerados são removidas. Cada PDF é substituído de uma vez (ver
+PDFGenerator.gerar_contrato), então downloads e anexos feitos durante a
+execução nunca leem um arquivo incompleto.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import as_completed
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+
+from app.logging_config import configurar_logging
+from app.database import SessionLocal
+from app.models import Contrato
+from app.services import render_pool
+from app.staticfiles import PRECOMPRESSED_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+
+def carregar_checkpoint(caminho: str) -> Dict[str, Any]:
+    if os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    return {"ultimo_id": 0, "renderizados": 0, "falhas": []}
+
+
+def salvar_checkpoint(caminho: str, checkpoint: Dict[str, Any]) -> None:
+    # Escrita atômica: um checkpoint nunca fica pela metade
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(checkpoint, arquivo)
+    os.replace(temporario, caminho)
+
+
+def proximo_lote(db: Session, apos_id: int, tamanho: int, status: Optional[str]) -> List[Contrato]:
+    # Paginação por chave (id > último), sem OFFSET
+    query = db.query(Contrato).options(joinedload(Contrato.cliente)).filter(Contrato.id > apos_id)
+    if status:
+        query = query.filter(Contrato.status == status)
+    return query.order_by(Contrato.id).limit(tamanho).all()
+
+
+def remover_precomprimidos(pdf_path: str) -> None:
+    for sufixo in PRECOMPRESSED_SUFFIXES.values():
+        if os.path.exists(pdf_path + sufixo):
+            os.remove(pdf_path + sufixo)
+
+
+class LimitadorTaxa:
+    """
+    Espaça as chamadas de ``aguardar`` em no mínimo 1/``por_segundo``
+    segundos (sem limite com 0).
+    """
+
+    def __init__(self, por_segundo: float):
+        self.intervalo = 1 / por_segundo if por_segundo > 0 else 0
+        self._proxima = time.monotonic()
+
+    def aguardar(self) -> None:
+        if not self.intervalo:
+            return
+        agora = time.monotonic()
+        if self._proxima > agora:
+            time.sleep(self._proxima - agora)
+            agora = self._proxima
+        self._proxima = agora + self.intervalo
+
+
+def formatar_progresso(feitos: int, total: int, inicio: float) -> str:
+    decorrido = time.monotonic() - inicio
+    taxa = feitos / decorrido if decorrido else 0
+    eta = timedelta(seconds=round((total - feitos) / taxa)) if taxa else "?"
+    percentual = 100 * feitos / total if total else 100
+    return f"{feitos}/{total} ({percentual:.1f}%), {taxa:.1f} contratos/s, ETA {eta}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Regera os PDFs dos contratos existentes")
+    parser.add_argument("--lote", type=int, default=200, help="Contratos lidos do banco por vez (padrão: 200)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Processos de renderização (padrão: metade das CPUs, para não disputar com a API)")
+    parser.add_argument("--taxa-maxima", type=float, default=5,
+                        help="Máximo de contratos enviados ao pool por segundo (padrão: 5; 0 para sem limite)")
+    parser.add_argument("--status", default="assinado", help="Status dos contratos a regerar; vazio para todos")
+    parser.add_argument("--checkpoint", default="rerenderizar_contratos.checkpoint.json",
+                        help="Arquivo de progresso para retomada")
+    parser.add_argument("--recomecar", action="store_true", help="Ignora o checkpoint e começa do início")
+    args = parser.parse_args()
+
+    configurar_logging()
+    os.environ["RENDER_WORKERS"] = str(args.workers)
+
+    checkpoint = {"ultimo_id": 0, "renderizados": 0, "falhas": []}
+    if not args.recomecar:
+        checkpoint = carregar_checkpoint(args.checkpoint)
+
+    db = SessionLocal()
+    total = db.query(func.count(Contrato.id)).filter(Contrato.id > checkpoint["ultimo_id"])
+    if args.status:
+        total = total.filter(Contrato.status == args.status)
+    total = total.scalar()
+    logger.info(
+        "🔄 Regerando %s contratos a partir do id %s com %s processos",
+        total, checkpoint["ultimo_id"], args.workers,
+    )
+
+    executor = render_pool.get_executor()
+    limitador = LimitadorTaxa(args.taxa_maxima)
+    inicio = time.monotonic()
+    feitos = 0
+    try:
+        while True:
+            contratos = proximo_lote(db, checkpoint["ultimo_id"], args.lote, args.status)
+            if not contratos:
+                break
+
+            trabalhos = [
+                (contrato.numero_contrato, render_pool.snapshot(contrato.cliente), render_pool.snapshot(contrato))
+                for contrato in contratos
+            ]
+            ultimo_id = contratos[-1].id
+            # Liberar a conexão enquanto o lote renderiza
+            db.rollback()
+
+            # A taxa é aplicada no envio ao pool (e não entre lotes), para
+            # que nenhum lote chegue ao pool em rajada
+            futures = {}
+            for numero_contrato, dados_cliente, dados_contrato in trabalhos:
+                limitador.aguardar()
+                futures[executor.submit(render_pool.render_contrato, dados_cliente, dados_contrato)] = numero_contrato
+
+            for future in as_completed(futures):
+                try:
+                    remover_precomprimidos(future.result())
+                    checkpoint["renderizados"] += 1
+                except Exception as exc:
+                    logger.error("❌ Erro ao regerar contrato %s: %s", futures[future], exc)
+                    checkpoint["falhas"].append(futures[future])
+
+            feitos += len(contratos)
+            checkpoint["ultimo_id"] = ultimo_id
+            salvar_checkpoint(args.checkpoint, checkpoint)
+            logger.info("📄 %s", formatar_progresso(feitos, total, inicio))
+    except KeyboardInterrupt:
+        logger.warning(
+            "⏸️ Interrompido após o id %s; execute novamente para continuar",
+            checkpoint["ultimo_id"],
+        )
+        render_pool.shutdown(wait=False)
+        raise SystemExit(130)
+    finally:
+        db.close()
+
+    render_pool.shutdown()
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    logger.info(
+        "✅ Concluído: %s contratos regerados, %s falhas (%s)",
+        checkpoint["renderizados"], len(checkpoint["falhas"]),
+        ", ".join(checkpoint["falhas"][:20]) or "nenhuma",
+    )
+
+
+if __name__ == "__main__":
+    main()
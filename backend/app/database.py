@@ -1,28 +1,97 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import Request, Response
+import itertools
 import os
+import time
 
 # URL do banco de dados (SQLite para MVP)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
 
-# Criar engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Réplicas de leitura (opcional, separadas por vírgula)
+DATABASE_READ_URLS = [url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
+
+# Por quantos segundos após uma escrita o cliente continua lendo do primário
+READ_AFTER_WRITE_SECONDS = int(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+# O frontend roda em outro site (outra origem/domínio), onde um cookie
+# SameSite=Lax não é enviado; a marca vai num cabeçalho que o cliente reenvia
+READ_AFTER_WRITE_HEADER = "X-Ler-Primario-Ate"
+
+def _criar_engine(url: str):
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+
+# Criar engines
+engine = _criar_engine(DATABASE_URL)
+read_engines = [_criar_engine(url) for url in DATABASE_READ_URLS]
+_proxima_replica = itertools.cycle(read_engines) if read_engines else None
+
+class RoutingSession(Session):
+    """
+    Sessão que direciona consultas para uma réplica de leitura.
+
+    A réplica é escolhida (round-robin) ao abrir a sessão de leitura e fica
+    em ``info["replica"]``. Flushes e qualquer sessão que já escreveu usam
+    sempre o primário; sem réplica definida, tudo vai para o primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is None or self._flushing or self.info.get("escreveu"):
+            return engine
+        return replica
 
 # Criar SessionLocal
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 # Base para os models
 Base = declarative_base()
 
-# Dependency para obter sessão do banco
-def get_db():
+@event.listens_for(RoutingSession, "after_flush")
+def _marcar_escrita(session, flush_context):
+    session.info["escreveu"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _fixar_leituras_no_primario(session):
+    # Read-your-writes: após um commit com escrita, a resposta leva o
+    # instante até o qual as leituras deste cliente devem ir ao primário;
+    # o cliente o reenvia no mesmo cabeçalho
+    response = session.info.get("response")
+    if session.info.get("escreveu") and response is not None and read_engines:
+        response.headers[READ_AFTER_WRITE_HEADER] = str(int(time.time()) + READ_AFTER_WRITE_SECONDS)
+
+# Dependency para obter sessão do banco (primário, para rotas que escrevem)
+def get_db(response: Response):
     db = SessionLocal()
+    db.info["response"] = response
     try:
         yield db
     finally:
         db.close()
 
+# Dependency para rotas somente leitura (réplica, quando configurada)
+def get_read_db(request: Request):
+    db = SessionLocal()
+    if _proxima_replica is not None and not _leitura_fixada_no_primario(request):
+        db.info["replica"] = next(_proxima_replica)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _leitura_fixada_no_primario(request: Request) -> bool:
+    try:
+        ate = int(request.headers.get(READ_AFTER_WRITE_HEADER, "0"))
+    except ValueError:
+        return False
+    # Valores além da janela máxima são ignorados, para que um cliente não
+    # fixe suas leituras no primário indefinidamente
+    agora = time.time()
+    return agora < ate <= agora + READ_AFTER_WRITE_SECONDS + 1
+
+def leu_do_primario(db: Session) -> bool:
+    """Se as leituras desta sessão foram ao primário (e não a uma réplica)."""
+    return db.info.get("replica") is None or bool(db.info.get("escreveu"))
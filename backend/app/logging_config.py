@@ -0,0 +1,164 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Id da requisição atual (definido pelo RequestIdMiddleware)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Atributos padrão de LogRecord; o resto vem de ``extra`` e vai para o JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON com data, nível, logger,
+    mensagem, id da requisição e os campos passados em ``extra``.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            data["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Amostragem e limite de taxa por logger para registros abaixo de WARNING.
+
+    Args:
+        sample_rates: Fração mantida por prefixo de logger (ex.: {"app.services.email_service": 0.1})
+        rate_caps: Máximo de registros por segundo por prefixo de logger
+
+    Avisos e erros nunca são descartados.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], rate_caps: Dict[str, float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_caps = rate_caps
+        self._windows: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rate = self._lookup(self.sample_rates, record.name)
+        if rate is not None and random.random() >= rate:
+            return False
+
+        cap = self._lookup(self.rate_caps, record.name)
+        if cap is not None:
+            second = int(time.monotonic())
+            with self._lock:
+                window, count = self._windows.get(record.name, (second, 0))
+                if window != second:
+                    window, count = second, 0
+                if count >= cap:
+                    return False
+                self._windows[record.name] = (window, count + 1)
+        return True
+
+    @staticmethod
+    def _lookup(config: Dict[str, float], name: str) -> Optional[float]:
+        # Prefixo mais específico vence ("app.services" cobre "app.services.email_service")
+        while name:
+            if name in config:
+                return config[name]
+            name = name.rpartition(".")[0]
+        return None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não formata a mensagem na thread da requisição.
+
+    O QueueHandler padrão chama ``format`` em ``prepare``; aqui o registro é
+    apenas copiado (com o id da requisição) e a interpolação de ``msg % args``
+    acontece na thread do listener. Os argumentos de log devem, portanto,
+    ser valores que não mudam depois da chamada (strings, números).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.request_id = request_id_var.get()
+        return record
+
+
+def _parse_config(value: str) -> Dict[str, float]:
+    # Formato: "logger=valor,logger=valor"
+    config = {}
+    for item in value.split(","):
+        name, _, number = item.partition("=")
+        if name.strip() and number.strip():
+            config[name.strip()] = float(number)
+    return config
+
+
+def configurar_logging() -> logging.handlers.QueueListener:
+    """
+    Configura o logging da aplicação: registros passam por um
+    ``QueueHandler`` e são formatados e escritos por uma thread listener,
+    fora do event loop.
+
+    Configuração (variáveis de ambiente):
+        - LOG_LEVEL (padrão: INFO)
+        - LOG_FORMAT: json (padrão) ou texto
+        - LOG_SAMPLING: fração mantida por logger, ex.:
+          "app.services.email_service=0.1,app.services.signature_simulator=0.5"
+        - LOG_RATE_LIMIT: registros por segundo por logger, ex.:
+          "app.services.email_service=20"
+
+    Pode ser chamada mais de uma vez; só a primeira chamada configura.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if os.getenv("LOG_FORMAT", "json") == "json":
+        formatter: logging.Formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s")
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(
+        _parse_config(os.getenv("LOG_SAMPLING", "")),
+        _parse_config(os.getenv("LOG_RATE_LIMIT", "")),
+    ))
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,2 @@
+# Middleware module
+
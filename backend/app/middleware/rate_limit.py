@@ -0,0 +1,359 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, List, Optional, Pattern, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend(ABC):
+    """
+    Interface para o armazenamento dos token buckets.
+
+    Permite trocar o backend em memória (um processo) por um compartilhado
+    entre workers, via variável de ambiente RATE_LIMIT_BACKEND.
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1) -> Tuple[bool, float]:
+        """
+        Consome ``cost`` fichas do bucket ``key``.
+
+        Args:
+            key: Identificador do bucket (classe de rota + cliente)
+            rate: Fichas repostas por segundo
+            capacity: Tamanho máximo do bucket (rajada permitida)
+            cost: Fichas cobradas pela requisição (no máximo ``capacity``)
+
+        Returns:
+            Tuple[bool, float]: Se a requisição foi aceita e, se não foi,
+            quantos segundos até haver fichas suficientes
+        """
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets em memória, limitados a ``max_keys`` clientes (LRU).
+    Cada worker mantém seus próprios buckets.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets compartilhados no Redis, atualizados atomicamente por um
+    script Lua. Requer o pacote ``redis`` (não incluído em requirements.txt).
+    """
+
+    SCRIPT = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(data[1]) or capacity
+    local updated = tonumber(data[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local allowed = 0
+    local retry = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry)}
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis requer o pacote 'redis' (pip install redis)"
+            ) from exc
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1) -> Tuple[bool, float]:
+        allowed, retry = await self._script(keys=[self.prefix + key], args=[rate, capacity, cost])
+        return bool(allowed), float(retry)
+
+
+class ConcurrencyLimiter:
+    """
+    Limita quantas requisições de uma classe de rota executam ao mesmo tempo.
+
+    Até ``max_waiting`` requisições aguardam por no máximo ``wait_timeout``
+    segundos; as demais são recusadas imediatamente, sem fila ilimitada.
+    O limite vale por worker.
+    """
+
+    def __init__(self, max_concurrent: int, max_waiting: int, wait_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+
+    async def acquire(self) -> bool:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return True
+        if self._waiting >= self.max_waiting:
+            return False
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiting -= 1
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+class RouteClass:
+    """
+    Grupo de rotas com orçamento próprio de requisições.
+
+    O orçamento é lido de ``RATE_LIMIT_<NOME>`` no formato
+    ``<requisições>/<segundos>`` (ex.: ``10/60``); o número de requisições
+    também é a rajada máxima. Com ``CONCURRENCY_LIMIT_<NOME>`` definido,
+    a classe ganha um limitador de concorrência.
+
+    Por padrão cada requisição custa uma ficha; com ``cost``, o custo é
+    calculado a partir do corpo da requisição (ex.: itens de um lote), e o
+    orçamento passa a ser medido nessa unidade.
+    """
+
+    def __init__(self, name: str, pattern: str, methods: Optional[List[str]] = None, default_budget: str = "120/60",
+                 default_concurrency: Optional[int] = None, cost: Optional[Callable[[bytes], int]] = None):
+        self.name = name
+        self.pattern: Pattern = re.compile(pattern)
+        self.methods = methods
+        self.cost = cost
+
+        requests, seconds = os.getenv(f"RATE_LIMIT_{name.upper()}", default_budget).split("/")
+        self.capacity = float(requests)
+        self.rate = self.capacity / float(seconds)
+
+        concurrency = os.getenv(f"CONCURRENCY_LIMIT_{name.upper()}")
+        max_concurrent = int(concurrency) if concurrency else default_concurrency
+        self.limiter = None
+        if max_concurrent:
+            self.limiter = ConcurrencyLimiter(
+                max_concurrent=max_concurrent,
+                max_waiting=int(os.getenv("CONCURRENCY_MAX_WAITING", str(max_concurrent * 2))),
+                wait_timeout=float(os.getenv("CONCURRENCY_WAIT_SECONDS", "2")),
+            )
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods and method not in self.methods:
+            return False
+        return bool(self.pattern.match(path))
+
+
+def itens_do_lote(body: bytes) -> int:
+    """Quantidade de itens de um corpo ``{"itens": [...]}`` (mínimo 1)."""
+    try:
+        itens = json.loads(body).get("itens")
+    except (ValueError, AttributeError):
+        return 1
+    return max(1, len(itens)) if isinstance(itens, list) else 1
+
+
+def default_route_classes() -> List[RouteClass]:
+    # Ordem importa: a primeira classe que corresponder é usada
+    return [
+        RouteClass("render", r"^/api/contratos/gerar$", ["POST"], "10/60", default_concurrency=os.cpu_count() or 2),
+        # Orçamento em contratos, não em requisições: mesma taxa de "render"
+        # (1 a cada 6s), com rajada suficiente para um lote completo
+        RouteClass("lote", r"^/api/contratos/lote$", ["POST"], "100/600", default_concurrency=os.cpu_count() or 2,
+                   cost=itens_do_lote),
+        RouteClass("cep", r"^/api/cep/", ["GET"], "30/60"),
+        RouteClass("default", r"^/api/", None, "120/60"),
+    ]
+
+
+def create_backend() -> RateLimitBackend:
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    if backend == "redis":
+        return RedisRateLimitBackend(os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0"))
+    return MemoryRateLimitBackend()
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI de controle de admissão.
+
+    Para cada requisição em /api:
+    1. Identifica a classe de rota e o cliente: a chave X-API-Key, se
+       estiver entre as chaves configuradas, ou o IP
+    2. Consome do token bucket (cliente, classe) o custo da requisição
+       (uma ficha, ou os itens do corpo em classes com ``cost``); sem
+       fichas suficientes -> 429
+    3. Nas classes com limitador de concorrência, aguarda uma vaga por tempo
+       limitado; sem vaga -> 503
+
+    Ambas as recusas trazem o cabeçalho Retry-After.
+
+    Configuração (variáveis de ambiente):
+        - RATE_LIMIT_ENABLED (padrão: 1)
+        - RATE_LIMIT_BACKEND: memory (padrão) ou redis
+        - RATE_LIMIT_REDIS_URL (padrão: redis://localhost:6379/0)
+        - RATE_LIMIT_API_KEYS: chaves aceitas em X-API-Key, separadas por
+          vírgula (padrão: nenhuma; chaves desconhecidas são ignoradas)
+        - RATE_LIMIT_TRUST_PROXY: usar X-Forwarded-For como IP (padrão: 0)
+        - RATE_LIMIT_PROXY_HOPS: proxies confiáveis à frente da aplicação
+          (padrão: 1). O IP é a entrada de X-Forwarded-For adicionada pelo
+          proxy mais distante, contada da direita; as entradas à esquerda
+          vêm do cliente e não são usadas
+    """
+
+    def __init__(self, app: ASGIApp, backend: Optional[RateLimitBackend] = None,
+                 route_classes: Optional[List[RouteClass]] = None):
+        self.app = app
+        self.enabled = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+        self.trust_proxy = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+        self.proxy_hops = max(1, int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1")))
+        self.api_keys = {key.strip() for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip()}
+        self.backend = backend or create_backend()
+        self.route_classes = route_classes if route_classes is not None else default_route_classes()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self._classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = self._client_key(scope)
+        cost = 1
+        if route_class.cost is not None:
+            body = await self._read_body(receive)
+            # Um custo acima da capacidade nunca seria atendido
+            cost = min(route_class.cost(body), route_class.capacity)
+            receive = self._replay(body, receive)
+
+        allowed, retry_after = await self.backend.consume(
+            f"{route_class.name}:{client}", route_class.rate, route_class.capacity, cost
+        )
+        if not allowed:
+            logger.warning("🚦 Limite de requisições excedido: %s (%s)", client, route_class.name)
+            response = self._reject(429, "Limite de requisições excedido. Tente novamente mais tarde.", retry_after)
+            await response(scope, receive, send)
+            return
+
+        limiter = route_class.limiter
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            logger.warning("🚦 Capacidade esgotada para %s", route_class.name)
+            response = self._reject(503, "Serviço temporariamente sobrecarregado. Tente novamente.", limiter.wait_timeout)
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    def _classify(self, method: str, path: str) -> Optional[RouteClass]:
+        for route_class in self.route_classes:
+            if route_class.matches(method, path):
+                return route_class
+        return None
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _replay(body: bytes, receive: Receive) -> Receive:
+        # Entrega à aplicação o corpo já lido pelo middleware
+        pending = True
+
+        async def replay() -> dict:
+            nonlocal pending
+            if pending:
+                pending = False
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
+
+    def _client_key(self, scope: Scope) -> str:
+        headers = dict(scope.get("headers") or [])
+        # Só chaves configuradas ganham bucket próprio; uma chave qualquer
+        # permitiria contornar o limite trocando de chave a cada requisição
+        api_key = headers.get(b"x-api-key", b"").decode("latin-1")
+        if api_key in self.api_keys:
+            return "key:" + api_key
+
+        if self.trust_proxy and b"x-forwarded-for" in headers:
+            # Cada proxy acrescenta à direita o IP de quem o chamou; com N
+            # proxies confiáveis, a N-ésima entrada da direita é o cliente
+            hops = [ip.strip() for ip in headers[b"x-forwarded-for"].decode("latin-1").split(",")]
+            if len(hops) >= self.proxy_hops and hops[-self.proxy_hops]:
+                return "ip:" + hops[-self.proxy_hops]
+
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "desconhecido")
+
+    @staticmethod
+    def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+        return JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -29,12 +30,16 @@ class Cliente(Base):
     # Timestamps
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
     atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relacionamentos (lazy="raise_on_sql": carregamento preguiçoso gera erro,
+    # então consultas com várias linhas precisam de joinedload/selectinload)
+    contratos = relationship("Contrato", back_populates="cliente", lazy="raise_on_sql")
 
 class Contrato(Base):
     __tablename__ = "contratos"
 
     id = Column(Integer, primary_key=True, index=True)
-    cliente_id = Column(Integer, nullable=False, index=True)
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False, index=True)
     numero_contrato = Column(String(50), unique=True, nullable=False, index=True)
     
     # Status do contrato
@@ -46,6 +51,7 @@ class Contrato(Base):
     # Dados do plano
     plano_nome = Column(String(100), nullable=False)
     plano_valor = Column(String(20), nullable=False)
+    plano_valor_centavos = Column(Integer, nullable=True)  # plano_valor em centavos (para somas)
     
     # Termos aceitos
     termos_aceitos = Column(Boolean, default=False)
@@ -54,4 +60,47 @@ class Contrato(Base):
     # Timestamps
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
     assinado_em = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relacionamentos
+    cliente = relationship("Cliente", back_populates="contratos", lazy="raise_on_sql")
+
+
+# Estatísticas consolidadas por dia, mantidas na mesma transação das
+# escritas (ver app/services/stats_service.py)
+
+class EstatisticaCadastroDiaria(Base):
+    __tablename__ = "estatisticas_cadastros_diarias"
+
+    dia = Column(Date, primary_key=True)
+    estado = Column(String(2), primary_key=True)
+    cidade = Column(String(100), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+class EstatisticaContratoDiaria(Base):
+    __tablename__ = "estatisticas_contratos_diarias"
+
+    dia = Column(Date, primary_key=True)
+    estado = Column(String(2), primary_key=True)
+    cidade = Column(String(100), primary_key=True)
+    plano_nome = Column(String(100), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    receita_centavos = Column(BigInteger, nullable=False, default=0)
+
+# Feed de alterações para sistemas externos (ver app/services/change_feed.py)
+
+class Evento(Base):
+    __tablename__ = "eventos"
+
+    # O id é o cursor do feed: só cresce, e eventos nunca são alterados
+    id = Column(Integer, primary_key=True)
+    tipo = Column(String(50), nullable=False)  # cliente.criado, contrato.assinado
+    entidade_id = Column(Integer, nullable=False)
+    dados = Column(JSON, nullable=False)
+    criado_em = Column(DateTime(timezone=True), server_default=func.now())
+
+class CursorEventos(Base):
+    __tablename__ = "eventos_cursores"
 
+    # Último evento entregue por consumidor interno (ex.: webhook)
+    consumidor = Column(String(50), primary_key=True)
+    cursor = Column(Integer, nullable=False, default=0)
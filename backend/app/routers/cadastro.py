@@ -1,39 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
+import asyncio
 import httpx
-from datetime import datetime
+import logging
+import os
+from datetime import date, datetime, time, timedelta
 
-from app.database import get_db
-from app.models import Cliente, Contrato
+from app.database import get_db, get_read_db, leu_do_primario
+from app.models import Cliente, Contrato, EstatisticaCadastroDiaria, EstatisticaContratoDiaria
 from app.schemas import (
     ClienteCreate, 
     ClienteResponse, 
+    ClienteBuscaResponse,
     ContratoCreate, 
     ContratoResponse,
+    ContratoComClienteResponse,
+    ContratoLoteCreate,
+    ContratoLoteResponse,
+    EstatisticasResponse,
+    EventosResponse,
     CEPResponse
 )
 from app.services.signature_simulator import SignatureSimulatorService
 from app.services.pdf_generator import PDFGenerator
+from app.services.cache_service import ReadThroughCache, conditional_response
+from app.services.search_index import cliente_search_index
+from app.services.contract_bundle import ContractBundleStreamer
+from app.services.attachment_store import download_links
+from app.services.render_pool import render_contrato_async
+from app.services.stats_service import estatisticas, parse_valor_centavos
+from app.services.cpf_filter import cpf_filter
+from app.services.change_feed import change_feed
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # Serviços
 signature_service = SignatureSimulatorService()
 pdf_generator = PDFGenerator()
+lookup_cache = ReadThroughCache()
+bundle_streamer = ContractBundleStreamer()
 
 @router.post("/clientes", response_model=ClienteResponse, status_code=status.HTTP_201_CREATED)
 async def criar_cliente(cliente: ClienteCreate, db: Session = Depends(get_db)):
     """
     Criar novo cliente no sistema
     """
-    # Verificar se CPF já existe
-    existing = db.query(Cliente).filter(Cliente.cpf == cliente.cpf).first()
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="CPF já cadastrado no sistema"
-        )
+    # Verificar se CPF já existe (só consulta o banco se o filtro não
+    # descartar o CPF; a restrição UNIQUE cobre o restante)
+    if cpf_filter.pode_conter(cliente.cpf):
+        existing = db.query(Cliente).filter(Cliente.cpf == cliente.cpf).first()
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="CPF já cadastrado no sistema"
+            )
     
     # Criar cliente
     db_cliente = Cliente(
@@ -55,23 +80,74 @@ async def criar_cliente(cliente: ClienteCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_cliente)
+    estatisticas.registrar_cadastro(db, db_cliente)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        cpf_filter.adicionar(cliente.cpf)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CPF já cadastrado no sistema"
+        )
+    change_feed.registrar(db, "cliente.criado", db_cliente)
     db.commit()
+    cpf_filter.adicionar(cliente.cpf)
     db.refresh(db_cliente)
+    lookup_cache.invalidate(("cliente", db_cliente.id))
     
     return db_cliente
 
+@router.get("/clientes/busca", response_model=ClienteBuscaResponse)
+async def buscar_clientes(
+    q: str = Query(..., min_length=3, max_length=100),
+    pagina: int = Query(1, ge=1),
+    por_pagina: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Buscar clientes por trecho de nome, e-mail, celular, CPF ou placa
+    
+    A busca ignora acentos e maiúsculas; os resultados vêm ordenados por relevância.
+    """
+    total, ids = cliente_search_index.buscar(db, q, pagina, por_pagina)
+    clientes = db.query(Cliente).filter(Cliente.id.in_(ids)).all() if ids else []
+    por_id = {cliente.id: cliente for cliente in clientes}
+    
+    return {
+        "total": total,
+        "pagina": pagina,
+        "por_pagina": por_pagina,
+        "resultados": [por_id[i] for i in ids if i in por_id],
+    }
+
 @router.get("/clientes/{cliente_id}", response_model=ClienteResponse)
-async def obter_cliente(cliente_id: int, db: Session = Depends(get_db)):
+async def obter_cliente(cliente_id: int, request: Request, db: Session = Depends(get_read_db)):
     """
     Obter dados de um cliente específico
+    
+    Usa cache de leitura (preenchido só por leituras do primário); responde
+    304 quando o If-None-Match corresponde ao ETag.
     """
-    cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
-    if not cliente:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Cliente não encontrado"
+    cache_key = ("cliente", cliente_id)
+    entry = lookup_cache.get(cache_key)
+    if entry is None:
+        cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
+        if not cliente:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cliente não encontrado"
+            )
+        modificado_em = cliente.atualizado_em or cliente.criado_em
+        entry = lookup_cache.set(
+            cache_key,
+            ClienteResponse.model_validate(cliente).model_dump(mode="json"),
+            version=modificado_em,
+            last_modified=modificado_em,
+            # Réplica atrasada não pode gravar no cache compartilhado
+            store=leu_do_primario(db),
         )
-    return cliente
+    return conditional_response(request, entry)
 
 @router.post("/contratos/gerar", response_model=ContratoResponse)
 async def gerar_contrato(contrato_data: ContratoCreate, db: Session = Depends(get_db)):
@@ -107,6 +183,7 @@ async def gerar_contrato(contrato_data: ContratoCreate, db: Session = Depends(ge
         numero_contrato=numero_contrato,
         plano_nome=contrato_data.plano_nome,
         plano_valor=contrato_data.plano_valor,
+        plano_valor_centavos=parse_valor_centavos(contrato_data.plano_valor),
         termos_aceitos=contrato_data.termos_aceitos,
         data_aceite=datetime.now() if contrato_data.termos_aceitos else None,
         status="pendente"
@@ -115,6 +192,7 @@ async def gerar_contrato(contrato_data: ContratoCreate, db: Session = Depends(ge
     db.add(db_contrato)
     db.commit()
     db.refresh(db_contrato)
+    lookup_cache.invalidate(("contrato", db_contrato.id))
     
     # Gerar PDF do contrato
     pdf_path = pdf_generator.gerar_contrato(cliente, db_contrato)
@@ -126,24 +204,384 @@ async def gerar_contrato(contrato_data: ContratoCreate, db: Session = Depends(ge
     db_contrato.status = "assinado"
     db_contrato.assinado_em = datetime.now()
     db_contrato.arquivo_pdf = resultado["contract_url"]
+    estatisticas.registrar_contrato_assinado(db, cliente, db_contrato)
+    change_feed.registrar(db, "contrato.assinado", db_contrato)
     
     db.commit()
     db.refresh(db_contrato)
+    lookup_cache.invalidate(("contrato", db_contrato.id))
     
     return db_contrato
 
+def _novo_contrato(item: ContratoCreate, numero_contrato: str) -> Contrato:
+    return Contrato(
+        cliente_id=item.cliente_id,
+        numero_contrato=numero_contrato,
+        plano_nome=item.plano_nome,
+        plano_valor=item.plano_valor,
+        plano_valor_centavos=parse_valor_centavos(item.plano_valor),
+        termos_aceitos=item.termos_aceitos,
+        data_aceite=datetime.now() if item.termos_aceitos else None,
+        status="pendente"
+    )
+
+@router.post("/contratos/lote", response_model=ContratoLoteResponse)
+async def gerar_contratos_lote(lote: ContratoLoteCreate, db: Session = Depends(get_db)):
+    """
+    Gerar e assinar vários contratos em uma chamada (frotas)
+    
+    Os contratos são inseridos em uma única transação, os PDFs são
+    renderizados em paralelo no pool de processos e cada destinatário
+    recebe um único e-mail. O resultado é informado item a item; contratos
+    cujo PDF falhou são descartados e podem ser pedidos novamente.
+    """
+    ids = {item.cliente_id for item in lote.itens}
+    clientes = {c.id: c for c in db.query(Cliente).filter(Cliente.id.in_(ids))}
+    ja_assinados = {
+        cliente_id for (cliente_id,) in db.query(Contrato.cliente_id).filter(
+            Contrato.cliente_id.in_(ids),
+            Contrato.status == "assinado"
+        )
+    }
+    
+    data = datetime.now().strftime('%Y%m%d')
+    numeros = {cliente_id: f"CTR-{data}-{cliente_id:04d}" for cliente_id in ids}
+    numeros_existentes = {
+        numero for (numero,) in db.query(Contrato.numero_contrato).filter(
+            Contrato.numero_contrato.in_(numeros.values())
+        )
+    }
+    
+    resultados = [{"indice": i, "cliente_id": item.cliente_id, "sucesso": False} for i, item in enumerate(lote.itens)]
+    validos = []
+    vistos = set()
+    for resultado, item in zip(resultados, lote.itens):
+        cliente = clientes.get(item.cliente_id)
+        if not cliente:
+            resultado["erro"] = "Cliente não encontrado"
+        elif item.cliente_id in ja_assinados:
+            resultado["erro"] = "Cliente já possui contrato assinado"
+        elif item.cliente_id in vistos:
+            resultado["erro"] = "Cliente repetido no lote"
+        elif numeros[item.cliente_id] in numeros_existentes:
+            resultado["erro"] = "Já existe contrato pendente para este cliente hoje"
+        else:
+            vistos.add(item.cliente_id)
+            validos.append((resultado, cliente, item))
+    
+    # Inserir todos os contratos do lote em uma única transação. Outro lote
+    # (ou /contratos/gerar) pode gravar o mesmo número entre a verificação
+    # acima e o INSERT: esses itens falham e os demais são inseridos de novo
+    while True:
+        pendentes = [
+            (resultado, cliente, _novo_contrato(item, numeros[item.cliente_id]))
+            for resultado, cliente, item in validos
+        ]
+        db.add_all(db_contrato for _, _, db_contrato in pendentes)
+        try:
+            db.flush()
+            break
+        except IntegrityError:
+            db.rollback()
+            ocupados = {
+                numero for (numero,) in db.query(Contrato.numero_contrato).filter(
+                    Contrato.numero_contrato.in_([numeros[item.cliente_id] for _, _, item in validos])
+                )
+            }
+            if not ocupados:
+                raise
+            for resultado, _, item in validos:
+                if numeros[item.cliente_id] in ocupados:
+                    resultado["erro"] = "Já existe contrato para este cliente hoje"
+            validos = [valido for valido in validos if numeros[valido[2].cliente_id] not in ocupados]
+    contrato_ids = [db_contrato.id for _, _, db_contrato in pendentes]
+    db.commit()
+    # O commit expira os objetos: recarregar contratos e clientes em uma
+    # única consulta, em vez de um SELECT por objeto nos snapshots
+    if contrato_ids:
+        db.query(Contrato).options(joinedload(Contrato.cliente)).filter(Contrato.id.in_(contrato_ids)).all()
+    
+    # Renderizar PDFs em paralelo (processos)
+    renders = await asyncio.gather(
+        *(render_contrato_async(cliente, db_contrato) for _, cliente, db_contrato in pendentes),
+        return_exceptions=True
+    )
+    
+    renderizados = []
+    for (resultado, cliente, db_contrato), pdf_path in zip(pendentes, renders):
+        if isinstance(pdf_path, Exception):
+            logger.error("❌ Erro ao renderizar contrato %s: %s", db_contrato.numero_contrato, pdf_path)
+            resultado["erro"] = "Erro ao gerar PDF do contrato"
+            # Removido no commit final: o número do contrato é o mesmo em uma
+            # nova tentativa no mesmo dia e não pode ficar ocupado
+            db.delete(db_contrato)
+        else:
+            renderizados.append((resultado, cliente, db_contrato, pdf_path))
+    
+    # Assinar (um e-mail por destinatário) e atualizar status
+    assinaturas = signature_service.sign_documents(
+        [(cliente, db_contrato, pdf_path) for _, cliente, db_contrato, pdf_path in renderizados]
+    )
+    for (resultado, cliente, db_contrato, _), assinatura in zip(renderizados, assinaturas):
+        db_contrato.status = "assinado"
+        db_contrato.assinado_em = datetime.now()
+        db_contrato.arquivo_pdf = assinatura["contract_url"]
+        change_feed.registrar(db, "contrato.assinado", db_contrato)
+        resultado["sucesso"] = True
+        resultado["contrato"] = db_contrato
+    estatisticas.registrar_contratos_assinados(
+        db, [(cliente, db_contrato) for _, cliente, db_contrato, _ in renderizados]
+    )
+    
+    db.commit()
+    if contrato_ids:
+        db.query(Contrato).filter(Contrato.id.in_(contrato_ids)).all()
+    for contrato_id in contrato_ids:
+        lookup_cache.invalidate(("contrato", contrato_id))
+    
+    sucesso = sum(1 for resultado in resultados if resultado["sucesso"])
+    return {
+        "total": len(resultados),
+        "sucesso": sucesso,
+        "falhas": len(resultados) - sucesso,
+        "resultados": resultados,
+    }
+
+@router.get("/contratos/exportar", response_class=StreamingResponse)
+async def exportar_contratos(
+    assinado_de: Optional[date] = Query(None),
+    assinado_ate: Optional[date] = Query(None),
+    status_contrato: Optional[str] = Query(None, alias="status"),
+    numero_contrato: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Baixar um ZIP com os PDFs dos contratos que atendem ao filtro
+    
+    O arquivo é montado durante o envio, sem recompressão dos PDFs.
+    """
+    query = db.query(Contrato.numero_contrato)
+    if assinado_de:
+        query = query.filter(Contrato.assinado_em >= datetime.combine(assinado_de, time.min))
+    if assinado_ate:
+        query = query.filter(Contrato.assinado_em < datetime.combine(assinado_ate + timedelta(days=1), time.min))
+    if status_contrato:
+        query = query.filter(Contrato.status == status_contrato)
+    if numero_contrato:
+        query = query.filter(Contrato.numero_contrato.in_(numero_contrato))
+    
+    numeros = [numero for (numero,) in query.order_by(Contrato.numero_contrato)]
+    if not numeros:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nenhum contrato encontrado para o filtro informado"
+        )
+    
+    arquivos = (
+        (f"{numero}.pdf", os.path.join(pdf_generator.contracts_dir, f"{numero}.pdf"))
+        for numero in numeros
+    )
+    filename = f"contratos-{datetime.now().strftime('%Y%m%d%H%M%S')}.zip"
+    
+    return StreamingResponse(
+        bundle_streamer.stream(arquivos),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/contratos/download/{numero_contrato}", response_class=FileResponse)
+async def baixar_contrato(
+    numero_contrato: str,
+    expira: int = Query(...),
+    assinatura: str = Query(...),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Baixar o PDF de um contrato por link assinado (enviado por e-mail
+    quando o arquivo excede o limite de anexo)
+    """
+    if not download_links.verify(numero_contrato, expira, assinatura):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Link de download inválido ou expirado"
+        )
+    
+    contrato = db.query(Contrato).filter(Contrato.numero_contrato == numero_contrato).first()
+    pdf_path = os.path.join(pdf_generator.contracts_dir, f"{numero_contrato}.pdf")
+    if not contrato or not os.path.isfile(pdf_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contrato não encontrado"
+        )
+    
+    return FileResponse(pdf_path, media_type="application/pdf", filename=f"{numero_contrato}.pdf")
+
 @router.get("/contratos/{contrato_id}", response_model=ContratoResponse)
-async def obter_contrato(contrato_id: int, db: Session = Depends(get_db)):
+async def obter_contrato(contrato_id: int, request: Request, db: Session = Depends(get_read_db)):
     """
     Obter dados de um contrato específico
+    
+    Usa cache de leitura; contratos assinados ficam em cache sem expiração,
+    mesmo quando lidos de uma réplica. Pendentes só são guardados quando
+    lidos do primário.
+    """
+    cache_key = ("contrato", contrato_id)
+    entry = lookup_cache.get(cache_key)
+    if entry is None:
+        contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
+        if not contrato:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Contrato não encontrado"
+            )
+        modificado_em = contrato.assinado_em or contrato.criado_em
+        entry = lookup_cache.set(
+            cache_key,
+            ContratoResponse.model_validate(contrato).model_dump(mode="json"),
+            version=(contrato.status, modificado_em),
+            last_modified=modificado_em,
+            immutable=contrato.status == "assinado",
+            # Assinado não muda mais: mesmo lido de uma réplica, é o valor
+            # final. Pendentes só entram no cache se lidos do primário
+            store=leu_do_primario(db) or contrato.status == "assinado",
+        )
+    return conditional_response(request, entry)
+
+@router.get("/contratos/{contrato_id}/completo", response_model=ContratoComClienteResponse)
+async def obter_contrato_completo(
+    contrato_id: int,
+    campos_cliente: Optional[str] = Query(None, description="Campos do cliente separados por vírgula"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Obter um contrato com os dados do cliente em uma única consulta
+    
+    Com ``campos_cliente`` (ex.: "nome_completo,email") apenas esses campos
+    do cliente são devolvidos.
     """
-    contrato = db.query(Contrato).filter(Contrato.id == contrato_id).first()
+    campos = None
+    if campos_cliente:
+        campos = {campo.strip() for campo in campos_cliente.split(",") if campo.strip()}
+        invalidos = campos - set(ClienteResponse.model_fields)
+        if invalidos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos de cliente inválidos: {', '.join(sorted(invalidos))}"
+            )
+    
+    contrato = (
+        db.query(Contrato)
+        .options(joinedload(Contrato.cliente))
+        .filter(Contrato.id == contrato_id)
+        .first()
+    )
     if not contrato:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Contrato não encontrado"
         )
-    return contrato
+    
+    resultado = ContratoComClienteResponse.model_validate(contrato)
+    if campos is None:
+        return resultado
+    
+    include = {campo: True for campo in ContratoResponse.model_fields}
+    include["cliente"] = campos
+    return JSONResponse(resultado.model_dump(mode="json", include=include))
+
+@router.get("/estatisticas", response_model=EstatisticasResponse)
+async def obter_estatisticas(
+    de: Optional[date] = Query(None, description="Primeiro dia (padrão: 30 dias atrás)"),
+    ate: Optional[date] = Query(None, description="Último dia (padrão: hoje)"),
+    estado: Optional[str] = Query(None, min_length=2, max_length=2),
+    cidade: Optional[str] = Query(None),
+    plano_nome: Optional[str] = Query(None),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Cadastros e contratos assinados por dia, estado, cidade e plano
+    
+    Lê apenas as tabelas de estatísticas consolidadas; ``plano_nome`` filtra
+    somente os contratos.
+    """
+    ate = ate or date.today()
+    de = de or ate - timedelta(days=30)
+    if de > ate:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Período inválido"
+        )
+    
+    cadastros = db.query(EstatisticaCadastroDiaria).filter(EstatisticaCadastroDiaria.dia.between(de, ate))
+    contratos = db.query(EstatisticaContratoDiaria).filter(EstatisticaContratoDiaria.dia.between(de, ate))
+    if estado:
+        cadastros = cadastros.filter(EstatisticaCadastroDiaria.estado == estado.upper())
+        contratos = contratos.filter(EstatisticaContratoDiaria.estado == estado.upper())
+    if cidade:
+        cadastros = cadastros.filter(EstatisticaCadastroDiaria.cidade == cidade)
+        contratos = contratos.filter(EstatisticaContratoDiaria.cidade == cidade)
+    if plano_nome:
+        contratos = contratos.filter(EstatisticaContratoDiaria.plano_nome == plano_nome)
+    
+    cadastros = cadastros.order_by(
+        EstatisticaCadastroDiaria.dia, EstatisticaCadastroDiaria.estado, EstatisticaCadastroDiaria.cidade
+    ).all()
+    contratos = contratos.order_by(
+        EstatisticaContratoDiaria.dia, EstatisticaContratoDiaria.estado,
+        EstatisticaContratoDiaria.cidade, EstatisticaContratoDiaria.plano_nome
+    ).all()
+    
+    return {
+        "de": de,
+        "ate": ate,
+        "total_cadastros": sum(linha.total for linha in cadastros),
+        "total_contratos": sum(linha.total for linha in contratos),
+        "receita_centavos": sum(linha.receita_centavos for linha in contratos),
+        "cadastros": cadastros,
+        "contratos": contratos,
+    }
+
+@router.get("/eventos", response_model=EventosResponse)
+async def listar_eventos(
+    cursor: int = Query(0, ge=0, description="Id do último evento recebido"),
+    limite: int = Query(100, ge=1, le=1000),
+    aguardar: float = Query(0, ge=0, le=30, description="Segundos a esperar por novos eventos (long-poll)"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Feed de alterações: clientes criados e contratos assinados
+    
+    Devolve, em ordem, os eventos com id maior que ``cursor``. O ``cursor``
+    da resposta deve ser enviado na próxima chamada. Com ``aguardar``, a
+    resposta espera novos eventos quando ainda não houver nenhum.
+    """
+    eventos = await change_feed.aguardar(db, cursor, limite, aguardar)
+    return {
+        "eventos": eventos,
+        "cursor": eventos[-1].id if eventos else cursor,
+    }
+
+@router.get("/eventos/stream", response_class=StreamingResponse)
+async def stream_eventos(
+    request: Request,
+    cursor: int = Query(0, ge=0, description="Id do último evento recebido"),
+    limite: int = Query(100, ge=1, le=1000)
+):
+    """
+    Feed de alterações via Server-Sent Events
+    
+    Na reconexão, o cabeçalho Last-Event-ID (enviado pelo EventSource)
+    tem precedência sobre ``cursor``.
+    """
+    ultimo_id = request.headers.get("last-event-id", "")
+    if ultimo_id.isdigit():
+        cursor = int(ultimo_id)
+    
+    return StreamingResponse(
+        change_feed.stream(cursor, limite),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/cep/{cep}")
 async def consultar_cep(cep: str):
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 import re
 
 class DadosVeiculo(BaseModel):
@@ -68,6 +68,12 @@ class ClienteResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ClienteBuscaResponse(BaseModel):
+    total: int
+    pagina: int
+    por_pagina: int
+    resultados: List[ClienteResponse]
+
 class ContratoCreate(BaseModel):
     cliente_id: int
     plano_nome: str = "Plano Premium"
@@ -82,12 +88,75 @@ class ContratoResponse(BaseModel):
     arquivo_pdf: Optional[str]
     plano_nome: str
     plano_valor: str
+    plano_valor_centavos: Optional[int] = None
     criado_em: datetime
     assinado_em: Optional[datetime]
 
     class Config:
         from_attributes = True
 
+class ContratoLoteCreate(BaseModel):
+    itens: List[ContratoCreate] = Field(..., min_length=1, max_length=100)
+
+class ContratoLoteItemResultado(BaseModel):
+    indice: int
+    cliente_id: int
+    sucesso: bool
+    contrato: Optional[ContratoResponse] = None
+    erro: Optional[str] = None
+
+class ContratoLoteResponse(BaseModel):
+    total: int
+    sucesso: int
+    falhas: int
+    resultados: List[ContratoLoteItemResultado]
+
+class ContratoComClienteResponse(ContratoResponse):
+    cliente: ClienteResponse
+
+class EstatisticaCadastroResponse(BaseModel):
+    dia: date
+    estado: str
+    cidade: str
+    total: int
+
+    class Config:
+        from_attributes = True
+
+class EstatisticaContratoResponse(BaseModel):
+    dia: date
+    estado: str
+    cidade: str
+    plano_nome: str
+    total: int
+    receita_centavos: int
+
+    class Config:
+        from_attributes = True
+
+class EstatisticasResponse(BaseModel):
+    de: date
+    ate: date
+    total_cadastros: int
+    total_contratos: int
+    receita_centavos: int
+    cadastros: List[EstatisticaCadastroResponse]
+    contratos: List[EstatisticaContratoResponse]
+
+class EventoResponse(BaseModel):
+    id: int
+    tipo: str
+    entidade_id: int
+    dados: Dict[str, Any]
+    criado_em: datetime
+
+    class Config:
+        from_attributes = True
+
+class EventosResponse(BaseModel):
+    eventos: List[EventoResponse]
+    cursor: int
+
 class CEPResponse(BaseModel):
     cep: str
     logradouro: str
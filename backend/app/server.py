@@ -0,0 +1,149 @@
+"""
+Inicia o servidor HTTP (uvicorn) com um perfil configurado por ambiente.
+
+Uso (no diretório backend):
+    python -m app.server
+
+Perfis (SERVER_PROFILE):
+    - producao (padrão): uvloop + httptools, sem --reload, limites de
+      conexões e backlog, keep-alive maior que o timeout ocioso do proxy e
+      encerramento gracioso (aguarda requisições e tarefas em andamento)
+    - desenvolvimento: --reload e configurações padrão do uvicorn
+
+Cada valor pode ser sobrescrito individualmente:
+    - SERVER_HOST (padrão: 0.0.0.0) e PORT (padrão: 8000)
+    - SERVER_WORKERS: processos (padrão: 1; PDFs já são renderizados em um
+      pool de processos à parte, e caches, filtros e limites são por processo)
+    - SERVER_LIMIT_CONCURRENCY: conexões/tarefas simultâneas antes de
+      responder 503 (padrão: 1000)
+    - SERVER_BACKLOG: fila de conexões do socket (padrão: 2048)
+    - SERVER_KEEP_ALIVE: segundos de keep-alive ocioso (padrão: 75)
+    - SERVER_GRACEFUL_SHUTDOWN: segundos para concluir requisições em
+      andamento ao receber SIGTERM (padrão: 30)
+    - SERVER_ACCESS_LOG: 1 para registrar cada requisição (padrão: 0)
+    - SERVER_FORWARDED_ALLOW_IPS: IPs dos proxies cujos X-Forwarded-For/
+      X-Forwarded-Proto são aceitos (padrão: 127.0.0.1). Defina apenas
+      onde há um proxy à frente e nunca "*", que deixa qualquer cliente
+      escolher o próprio IP (ver também RATE_LIMIT_TRUST_PROXY)
+
+Encerramento: ao receber SIGTERM, streams e long-polls do feed de eventos
+terminam na hora (os consumidores reconectam com o mesmo cursor); depois o
+uvicorn aguarda as demais requisições (SERVER_GRACEFUL_SHUTDOWN) e a
+aplicação drena as tarefas em segundo plano (TAREFAS_TIMEOUT_DRENAGEM,
+padrão: 20s). O orquestrador precisa esperar a soma antes de matar o
+processo: ``stop_grace_period`` no docker-compose.yml (``docker stop -t`` /
+``docker run --stop-timeout`` fora dele; o padrão do Docker é 10s) e
+``maxShutdownDelaySeconds`` no render.yaml, ambos em 60s.
+"""
+import importlib.util
+import logging
+import os
+from typing import Any, Dict
+
+import uvicorn
+from uvicorn.main import STARTUP_FAILURE
+from uvicorn.supervisors import ChangeReload, Multiprocess
+
+from app.logging_config import configurar_logging
+
+logger = logging.getLogger(__name__)
+
+PERFIS: Dict[str, Dict[str, Any]] = {
+    "producao": {
+        "loop": "uvloop",
+        "http": "httptools",
+        "workers": 1,
+        "limit_concurrency": 1000,
+        "backlog": 2048,
+        "timeout_keep_alive": 75,
+        "timeout_graceful_shutdown": 30,
+        "access_log": False,
+        "proxy_headers": True,
+        "forwarded_allow_ips": "127.0.0.1",
+        "server_header": False,
+    },
+    "desenvolvimento": {
+        "reload": True,
+    },
+}
+
+# Variável de ambiente -> (opção do uvicorn, conversão)
+SOBRESCRITAS = {
+    "SERVER_WORKERS": ("workers", int),
+    "SERVER_LIMIT_CONCURRENCY": ("limit_concurrency", int),
+    "SERVER_BACKLOG": ("backlog", int),
+    "SERVER_KEEP_ALIVE": ("timeout_keep_alive", int),
+    "SERVER_GRACEFUL_SHUTDOWN": ("timeout_graceful_shutdown", int),
+    "SERVER_ACCESS_LOG": ("access_log", lambda valor: valor == "1"),
+    "SERVER_FORWARDED_ALLOW_IPS": ("forwarded_allow_ips", str),
+}
+
+
+def configuracao() -> Dict[str, Any]:
+    """
+    Monta os argumentos de ``uvicorn.run`` a partir do perfil e das
+    variáveis de ambiente.
+    """
+    perfil = os.getenv("SERVER_PROFILE", "producao")
+    if perfil not in PERFIS:
+        raise ValueError(f"SERVER_PROFILE inválido: {perfil} (use {', '.join(PERFIS)})")
+
+    opcoes: Dict[str, Any] = {
+        "host": os.getenv("SERVER_HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", "8000")),
+        # Logs do uvicorn passam pela configuração da aplicação
+        "log_config": None,
+        **PERFIS[perfil],
+    }
+    for variavel, (opcao, converter) in SOBRESCRITAS.items():
+        valor = os.getenv(variavel)
+        if valor:
+            opcoes[opcao] = converter(valor)
+
+    # uvloop/httptools são opcionais (não existem no Windows, por exemplo)
+    for opcao, modulo in (("loop", "uvloop"), ("http", "httptools")):
+        if opcoes.get(opcao) == modulo and importlib.util.find_spec(modulo) is None:
+            logger.warning("⚠️ %s não instalado; usando a implementação padrão", modulo)
+            opcoes[opcao] = "auto"
+
+    if opcoes.get("workers", 1) > 1 and os.getenv("EVENTOS_WEBHOOK_URL"):
+        logger.warning("⚠️ Com SERVER_WORKERS > 1 cada processo entrega o webhook de eventos")
+
+    logger.info("🚀 Servidor: perfil %s, %s", perfil, {k: v for k, v in opcoes.items() if k != "log_config"})
+    return opcoes
+
+
+class Servidor(uvicorn.Server):
+    """
+    Servidor uvicorn que avisa a aplicação assim que o encerramento começa.
+
+    O lifespan da aplicação só é encerrado depois que todas as conexões
+    terminam; streams abertos (SSE, long-poll) segurariam o servidor até o
+    timeout e a drenagem das tarefas nunca rodaria.
+    """
+
+    def handle_exit(self, sig, frame) -> None:
+        # Importado aqui: o processo supervisor (workers > 1) não carrega a aplicação
+        from app.services.change_feed import change_feed
+
+        change_feed.encerrar()
+        super().handle_exit(sig, frame)
+
+
+def main() -> None:
+    configurar_logging()
+    # Equivalente a uvicorn.run, mas com Servidor no lugar de uvicorn.Server
+    config = uvicorn.Config("main:app", **configuracao())
+    servidor = Servidor(config)
+    if config.should_reload:
+        ChangeReload(config, target=servidor.run, sockets=[config.bind_socket()]).run()
+    elif config.workers > 1:
+        Multiprocess(config, target=servidor.run, sockets=[config.bind_socket()]).run()
+    else:
+        servidor.run()
+        if not servidor.started:
+            raise SystemExit(STARTUP_FAILURE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from email.mime.application import MIMEApplication
+from typing import Optional, Tuple
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+
+class AttachmentStore:
+    """
+    Cache limitado de anexos PDF já codificados em MIME (base64).
+
+    Cada contrato é lido e codificado uma única vez, logo após a renderização
+    do PDF; os envios seguintes reutilizam a mesma parte MIME, que não é
+    alterada depois de criada. A chave inclui tamanho e data de modificação
+    do arquivo, então um PDF regerado é codificado de novo.
+
+    Configuração (variáveis de ambiente):
+        - EMAIL_ATTACHMENT_CACHE_BYTES: limite do cache em bytes codificados
+          (padrão: 32 MiB)
+        - EMAIL_ATTACHMENT_MAX_BYTES: acima deste tamanho o PDF não é anexado
+          e o e-mail leva um link assinado para download (padrão: 5 MiB)
+    """
+
+    def __init__(self, max_cache_bytes: Optional[int] = None, max_attachment_bytes: Optional[int] = None):
+        self.max_cache_bytes = max_cache_bytes or int(os.getenv("EMAIL_ATTACHMENT_CACHE_BYTES", str(32 * 1024 * 1024)))
+        self.max_attachment_bytes = max_attachment_bytes or int(os.getenv("EMAIL_ATTACHMENT_MAX_BYTES", str(5 * 1024 * 1024)))
+        self._parts: "OrderedDict[Tuple[str, int, int], Tuple[MIMEApplication, int]]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def exceeds_limit(self, pdf_path: str) -> bool:
+        return os.path.getsize(pdf_path) > self.max_attachment_bytes
+
+    def get(self, contract_number: str, pdf_path: str) -> Optional[MIMEApplication]:
+        """
+        Retorna a parte MIME do contrato, codificando-a se ainda não estiver
+        em cache. Retorna None se o arquivo não existir ou exceder o limite
+        de anexo.
+        """
+        if not os.path.exists(pdf_path):
+            return None
+
+        stat = os.stat(pdf_path)
+        if stat.st_size > self.max_attachment_bytes:
+            return None
+
+        key = (pdf_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._parts.get(key)
+            if cached is not None:
+                self._parts.move_to_end(key)
+                return cached[0]
+
+        part = self._encode(contract_number, pdf_path)
+        size = len(part.get_payload())
+        with self._lock:
+            if key not in self._parts and size <= self.max_cache_bytes:
+                self._parts[key] = (part, size)
+                self._cached_bytes += size
+                while self._cached_bytes > self.max_cache_bytes:
+                    _, (_, removed) = self._parts.popitem(last=False)
+                    self._cached_bytes -= removed
+        return part
+
+    def prepare(self, contract_number: str, pdf_path: str) -> None:
+        """
+        Codifica o anexo antecipadamente (logo após a renderização do PDF),
+        para que o envio do e-mail encontre a parte MIME pronta.
+        """
+        self.get(contract_number, pdf_path)
+
+    @staticmethod
+    def _encode(contract_number: str, pdf_path: str) -> MIMEApplication:
+        with open(pdf_path, "rb") as pdf_file:
+            part = MIMEApplication(pdf_file.read(), _subtype="pdf")
+        part.add_header(
+            "Content-Disposition",
+            "attachment",
+            filename=f"{contract_number}.pdf"
+        )
+        return part
+
+
+class DownloadLinkSigner:
+    """
+    Gera e valida links de download de contratos assinados com HMAC-SHA256.
+
+    Configuração (variáveis de ambiente):
+        - DOWNLOAD_LINK_SECRET: chave do HMAC. Se ausente, uma chave aleatória
+          é gerada por processo e os links deixam de valer após reinício ou
+          em outros workers.
+        - PUBLIC_BASE_URL: URL pública da API (padrão: http://localhost:8000)
+        - DOWNLOAD_LINK_TTL_SECONDS: validade do link (padrão: 7 dias)
+    """
+
+    def __init__(self):
+        secret = os.getenv("DOWNLOAD_LINK_SECRET", "")
+        if not secret:
+            logger.warning("⚠️  DOWNLOAD_LINK_SECRET não configurado. Links de download valem só neste processo.")
+            secret = secrets.token_hex(32)
+        self._secret = secret.encode("utf-8")
+        self.base_url = os.getenv("PUBLIC_BASE_URL", "http://localhost:8000").rstrip("/")
+        self.ttl_seconds = int(os.getenv("DOWNLOAD_LINK_TTL_SECONDS", str(7 * 24 * 3600)))
+
+    def sign(self, contract_number: str) -> str:
+        expira = int(time.time()) + self.ttl_seconds
+        query = urlencode({"expira": expira, "assinatura": self._signature(contract_number, expira)})
+        return f"{self.base_url}/api/contratos/download/{contract_number}?{query}"
+
+    def verify(self, contract_number: str, expira: int, assinatura: str) -> bool:
+        if expira < time.time():
+            return False
+        return hmac.compare_digest(self._signature(contract_number, expira), assinatura)
+
+    def _signature(self, contract_number: str, expira: int) -> str:
+        digest = hmac.new(self._secret, f"{contract_number}:{expira}".encode("utf-8"), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+
+attachment_store = AttachmentStore()
+download_links = DownloadLinkSigner()
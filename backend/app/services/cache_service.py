@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """
+    Resposta serializada de uma consulta, pronta para ser reenviada.
+    """
+    payload: Dict[str, Any]
+    etag: str
+    last_modified: Optional[datetime]
+    expires_at: Optional[float]
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(_as_utc(self.last_modified), usegmt=True)
+        return headers
+
+
+class ReadThroughCache:
+    """
+    Cache em memória (LRU com expiração) para consultas por id.
+
+    As rotas consultam o cache antes do banco e gravam o resultado serializado
+    após uma leitura. Toda escrita que altera um registro deve chamar
+    ``invalidate`` com a mesma chave.
+
+    Configuração (variáveis de ambiente):
+        - CACHE_MAX_ENTRIES (padrão: 2048)
+        - CACHE_TTL_SECONDS (padrão: 300)
+
+    O cache é local ao processo: com vários workers, cada um mantém sua cópia
+    e a invalidação só alcança o worker que processou a escrita. Por isso
+    registros mutáveis expiram pelo TTL; registros imutáveis (contratos
+    assinados) podem ser gravados sem expiração.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("CACHE_TTL_SECONDS", "300"))
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(
+        self,
+        key: Hashable,
+        payload: Dict[str, Any],
+        version: Any,
+        last_modified: Optional[datetime] = None,
+        immutable: bool = False,
+        store: bool = True
+    ) -> CacheEntry:
+        """
+        Grava uma resposta no cache.
+
+        Args:
+            key: Chave da consulta (ex.: ("cliente", 1))
+            payload: Corpo JSON já serializado
+            version: Valor que muda a cada alteração do registro (usado no ETag)
+            last_modified: Data da última alteração do registro
+            immutable: Se True, a entrada só sai do cache por LRU ou invalidação
+            store: Se False, apenas monta a entrada sem gravá-la (ex.: dados
+                lidos de uma réplica, que podem estar defasados)
+        """
+        expires_at = None if immutable else time.monotonic() + self.ttl_seconds
+        entry = CacheEntry(
+            payload=payload,
+            etag=make_etag(key, version),
+            last_modified=last_modified,
+            expires_at=expires_at,
+        )
+        if not store:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def make_etag(key: Hashable, version: Any) -> str:
+    digest = hashlib.sha1(f"{key!r}:{version!r}".encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def conditional_response(request: Request, entry: CacheEntry) -> Response:
+    """
+    Responde 304 quando o If-None-Match do cliente corresponde ao ETag da
+    entrada; caso contrário devolve o payload em cache com os cabeçalhos
+    de validação.
+    """
+    headers = entry.headers()
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=entry.payload, headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devolve datas sem fuso; func.now() grava em UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
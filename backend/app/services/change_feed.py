@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.database import RoutingSession, SessionLocal
+from app.models import CursorEventos, Evento
+
+logger = logging.getLogger(__name__)
+
+
+def serializar(evento: Evento) -> Dict[str, Any]:
+    return jsonable_encoder({
+        "id": evento.id,
+        "tipo": evento.tipo,
+        "entidade_id": evento.entidade_id,
+        "dados": evento.dados,
+        "criado_em": evento.criado_em,
+    })
+
+
+class ChangeFeed:
+    """
+    Feed de alterações para sistemas externos (CRM, cobrança).
+
+    Cada cliente criado e cada contrato assinado gera uma linha na tabela
+    ``eventos``, gravada na mesma transação da alteração; o id da linha é o
+    cursor do feed. Consumidores leem "tudo depois do cursor X" por
+    long-poll, SSE ou pelo webhook, sem perder eventos entre consultas.
+
+    Quem espera por eventos é acordado logo após o commit que os grava
+    neste processo; eventos gravados por outros workers são vistos na
+    próxima consulta periódica (EVENTOS_INTERVALO_CONSULTA, padrão: 1s).
+
+    O cursor só é seguro se os ids forem confirmados na ordem em que são
+    gerados; caso contrário, um consumidor que já leu o id 11 nunca veria
+    o 10, confirmado depois. No SQLite isso vale porque as escritas são
+    serializadas pelo próprio banco. No PostgreSQL, duas transações podem
+    obter ids de uma sequência e confirmar em ordem inversa, então
+    ``registrar`` toma um advisory lock de transação antes de inserir:
+    quem grava eventos o faz um de cada vez, do INSERT ao commit.
+
+    No encerramento do servidor (``encerrar``), long-polls e streams
+    terminam imediatamente: o consumidor reconecta, com o mesmo cursor, a
+    outra instância, em vez de segurar o encerramento até o timeout.
+    """
+
+    # Chave do pg_advisory_xact_lock que serializa a gravação de eventos
+    LOCK_EVENTOS = 4_070_001
+
+    def __init__(self):
+        self.intervalo_consulta = float(os.getenv("EVENTOS_INTERVALO_CONSULTA", "1"))
+        self.heartbeat = float(os.getenv("EVENTOS_HEARTBEAT_SEGUNDOS", "15"))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._novo_evento: Optional[asyncio.Event] = None
+        self.encerrando = False
+
+    def registrar(self, db: Session, tipo: str, entidade: Any) -> None:
+        """
+        Adiciona um evento à sessão, com os dados já carregados da entidade.
+        Não faz commit: o evento é gravado junto com a alteração.
+
+        Args:
+            db: Sessão da alteração (a entidade já deve ter id, ex.: após flush)
+            tipo: Tipo do evento (ex.: "cliente.criado")
+            entidade: Objeto do ORM alterado
+        """
+        dados = {
+            column.key: entidade.__dict__[column.key]
+            for column in entidade.__table__.columns
+            if column.key in entidade.__dict__
+        }
+        if db.get_bind().dialect.name == "postgresql" and not db.info.get("eventos_novos"):
+            # Uma vez por transação; liberado automaticamente no commit/rollback
+            db.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": self.LOCK_EVENTOS})
+        db.add(Evento(tipo=tipo, entidade_id=entidade.id, dados=jsonable_encoder(dados)))
+        db.info["eventos_novos"] = True
+
+    def listar(self, db: Session, cursor: int, limite: int) -> List[Evento]:
+        return db.query(Evento).filter(Evento.id > cursor).order_by(Evento.id).limit(limite).all()
+
+    async def aguardar(self, db: Session, cursor: int, limite: int, timeout: float) -> List[Evento]:
+        """
+        Lista os eventos após ``cursor``; se não houver nenhum, espera até
+        ``timeout`` segundos por novos eventos (long-poll).
+        """
+        prazo = time.monotonic() + timeout
+        while True:
+            eventos = self.listar(db, cursor, limite)
+            restante = prazo - time.monotonic()
+            if eventos or restante <= 0 or self.encerrando:
+                return eventos
+            # Encerrar a transação devolve a conexão ao pool durante a
+            # espera e permite ver commits feitos depois dela
+            db.rollback()
+            await self._esperar_notificacao(min(restante, self.intervalo_consulta))
+
+    async def stream(self, cursor: int, limite: int) -> AsyncIterator[str]:
+        """
+        Gera o feed no formato Server-Sent Events a partir de ``cursor``,
+        com um comentário a cada ``heartbeat`` segundos sem eventos.
+        Termina quando o servidor começa a encerrar.
+        """
+        db = SessionLocal()
+        try:
+            while not self.encerrando:
+                eventos = await self.aguardar(db, cursor, limite, self.heartbeat)
+                db.rollback()
+                if not eventos:
+                    if not self.encerrando:
+                        yield ": ping\n\n"
+                    continue
+                for evento in eventos:
+                    dados = json.dumps(serializar(evento), ensure_ascii=False)
+                    yield f"id: {evento.id}\nevent: {evento.tipo}\ndata: {dados}\n\n"
+                cursor = eventos[-1].id
+        finally:
+            db.close()
+
+    async def _esperar_notificacao(self, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._novo_evento = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._novo_evento.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def encerrar(self) -> None:
+        """
+        Libera quem aguarda eventos e faz streams e long-polls terminarem
+        (pode ser chamado de outra thread ou de um tratador de sinal).
+        """
+        self.encerrando = True
+        self.notificar()
+
+    def notificar(self) -> None:
+        """Acorda quem aguarda eventos (pode ser chamado de outra thread)."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._acordar)
+
+    def _acordar(self) -> None:
+        novo_evento, self._novo_evento = self._novo_evento, asyncio.Event()
+        novo_evento.set()
+
+
+class WebhookDispatcher:
+    """
+    Entrega o feed em lotes via POST JSON (``{"eventos": [...], "cursor": N}``)
+    para EVENTOS_WEBHOOK_URL.
+
+    O cursor do último lote confirmado (resposta 2xx) fica na tabela
+    ``eventos_cursores``, então a entrega continua de onde parou após um
+    reinício. A entrega é "pelo menos uma vez": o receptor deve ignorar
+    eventos com id já processado. Falhas são repetidas com espera
+    exponencial. Deve rodar em um único processo.
+
+    Configuração (variáveis de ambiente):
+        - EVENTOS_WEBHOOK_URL: destino (sem ela o dispatcher não inicia)
+        - EVENTOS_WEBHOOK_LOTE: eventos por entrega (padrão: 100)
+        - EVENTOS_WEBHOOK_TIMEOUT: timeout da requisição em segundos (padrão: 10)
+    """
+
+    CONSUMIDOR = "webhook"
+    ESPERA_MAXIMA = 60
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url or os.getenv("EVENTOS_WEBHOOK_URL")
+        self.lote = int(os.getenv("EVENTOS_WEBHOOK_LOTE", "100"))
+        self.timeout = float(os.getenv("EVENTOS_WEBHOOK_TIMEOUT", "10"))
+        self._task: Optional[asyncio.Task] = None
+
+    def iniciar(self) -> None:
+        if self.url and self._task is None:
+            self._task = asyncio.create_task(self._executar())
+            logger.info("📡 Webhook de eventos ativo: %s", self.url)
+
+    async def parar(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _executar(self) -> None:
+        espera = 1
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            # No encerramento, o restante é entregue a partir do cursor salvo
+            while not change_feed.encerrando:
+                try:
+                    await self._entregar_lote(client)
+                    espera = 1
+                except Exception as exc:
+                    logger.warning("⚠️ Falha ao entregar eventos ao webhook: %s (nova tentativa em %ss)", exc, espera)
+                    await asyncio.sleep(espera)
+                    espera = min(espera * 2, self.ESPERA_MAXIMA)
+
+    async def _entregar_lote(self, client: httpx.AsyncClient) -> int:
+        db = SessionLocal()
+        try:
+            estado = db.get(CursorEventos, self.CONSUMIDOR)
+            cursor = estado.cursor if estado else 0
+            eventos = await change_feed.aguardar(db, cursor, self.lote, change_feed.heartbeat)
+            if not eventos:
+                return 0
+
+            response = await client.post(self.url, json={
+                "eventos": [serializar(evento) for evento in eventos],
+                "cursor": eventos[-1].id,
+            })
+            response.raise_for_status()
+
+            if estado is None:
+                estado = CursorEventos(consumidor=self.CONSUMIDOR)
+                db.add(estado)
+            estado.cursor = eventos[-1].id
+            db.commit()
+            logger.info("📡 %s eventos entregues ao webhook (cursor %s)", len(eventos), estado.cursor)
+            return len(eventos)
+        finally:
+            db.close()
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _notificar_eventos(session):
+    if session.info.pop("eventos_novos", False):
+        change_feed.notificar()
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _descartar_eventos(session):
+    session.info.pop("eventos_novos", None)
+
+
+# Instâncias compartilhadas
+change_feed = ChangeFeed()
+webhook_dispatcher = WebhookDispatcher()
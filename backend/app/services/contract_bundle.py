@@ -0,0 +1,86 @@
+import io
+import os
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Destino de escrita não posicionável para o ZipFile.
+
+    Como não suporta seek/tell, o ``zipfile`` grava cada entrada com
+    data descriptor e o arquivo pode ser enviado à medida que é produzido.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ContractBundleStreamer:
+    """
+    Monta um arquivo ZIP com PDFs de contratos sob demanda.
+
+    Os PDFs já são comprimidos, então entram no ZIP sem recompressão
+    (ZIP_STORED). Cada arquivo é lido em blocos de ``chunk_size`` bytes e
+    os bytes do ZIP são repassados assim que gerados, de modo que o uso de
+    memória não depende do tamanho nem da quantidade de arquivos.
+    """
+
+    MISSING_FILES_NAME = "ARQUIVOS_AUSENTES.txt"
+
+    def __init__(self, chunk_size: int = 64 * 1024):
+        self.chunk_size = chunk_size
+
+    def stream(self, arquivos: Iterable[Tuple[str, str]]) -> Iterator[bytes]:
+        """
+        Gera o ZIP em blocos.
+
+        Args:
+            arquivos: Pares (nome dentro do ZIP, caminho no disco)
+
+        Yields:
+            bytes: Próximo trecho do arquivo ZIP
+        """
+        buffer = _StreamBuffer()
+        ausentes = []
+
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as zf:
+            for nome, caminho in arquivos:
+                if not os.path.isfile(caminho):
+                    ausentes.append(nome)
+                    continue
+
+                info = zipfile.ZipInfo.from_file(caminho, arcname=nome)
+                info.compress_type = zipfile.ZIP_STORED
+                force_zip64 = info.file_size > zipfile.ZIP64_LIMIT
+
+                with open(caminho, "rb") as origem, zf.open(info, "w", force_zip64=force_zip64) as destino:
+                    while True:
+                        bloco = origem.read(self.chunk_size)
+                        if not bloco:
+                            break
+                        destino.write(bloco)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+
+                data = buffer.drain()
+                if data:
+                    yield data
+
+            if ausentes:
+                zf.writestr(self.MISSING_FILES_NAME, "\n".join(ausentes) + "\n")
+
+        yield buffer.drain()
@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import time
+from typing import Iterator
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+from app.models import Cliente
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Conjunto probabilístico em um ``bytearray``: ``item in filtro`` é
+    False apenas para itens nunca adicionados; True pode ser falso
+    positivo, com taxa próxima de ``taxa_falsos_positivos`` enquanto o
+    número de itens não passar de ``capacidade``.
+
+    As k posições de cada item vêm de um único hash blake2b de 128 bits,
+    dividido em dois valores combinados por hashing duplo (h1 + i*h2).
+    """
+
+    def __init__(self, capacidade: int, taxa_falsos_positivos: float = 0.01):
+        self.capacidade = capacidade
+        self.num_bits = max(8, math.ceil(-capacidade * math.log(taxa_falsos_positivos) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacidade * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.itens = 0
+
+    def _posicoes(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def adicionar(self, item: str) -> None:
+        for posicao in self._posicoes(item):
+            self.bits[posicao >> 3] |= 1 << (posicao & 7)
+        self.itens += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(item))
+
+    @property
+    def memoria_bytes(self) -> int:
+        return len(self.bits)
+
+    def taxa_estimada(self) -> float:
+        """Taxa de falsos positivos esperada para o número atual de itens."""
+        return (1 - math.exp(-self.num_hashes * self.itens / self.num_bits)) ** self.num_hashes
+
+
+def _somente_digitos(cpf: str) -> str:
+    return re.sub(r"\D", "", cpf)
+
+
+class CPFFilter:
+    """
+    Pré-verificação em memória de CPFs já cadastrados.
+
+    Um "não" do filtro é definitivo e dispensa a consulta ao banco antes do
+    INSERT; um "talvez" segue para a consulta normal. A restrição UNIQUE de
+    ``clientes.cpf`` continua sendo a garantia final (CPFs inseridos por
+    outro worker não estão no filtro deste processo), então quem usa o
+    filtro deve tratar IntegrityError.
+
+    Enquanto não for carregado, o filtro responde "talvez" para tudo.
+
+    Configuração (variáveis de ambiente):
+        - CPF_FILTRO_CAPACIDADE: CPFs previstos (padrão: 1000000; na carga
+          usa pelo menos o dobro dos já cadastrados)
+        - CPF_FILTRO_FPR: taxa de falsos positivos desejada (padrão: 0.01)
+    """
+
+    def __init__(self):
+        self.capacidade = int(os.getenv("CPF_FILTRO_CAPACIDADE", "1000000"))
+        self.taxa = float(os.getenv("CPF_FILTRO_FPR", "0.01"))
+        self._filtro = None
+        self._avisou_capacidade = False
+
+    def carregar(self, engine: Engine, batch_size: int = 10000) -> None:
+        """
+        Monta o filtro a partir de ``clientes.cpf`` (lido pelo índice, em lotes).
+        """
+        inicio = time.perf_counter()
+        with engine.connect() as connection:
+            total = connection.execute(select(func.count()).select_from(Cliente)).scalar()
+            filtro = BloomFilter(max(self.capacidade, 2 * total), self.taxa)
+            cpfs = connection.execution_options(yield_per=batch_size).execute(select(Cliente.cpf)).scalars()
+            for cpf in cpfs:
+                filtro.adicionar(_somente_digitos(cpf))
+        self._filtro = filtro
+        logger.info(
+            "🔎 Filtro de CPFs carregado: %s CPFs, %.1f KB, taxa de falsos positivos estimada %.4f (%.2fs)",
+            self._filtro.itens, self._filtro.memoria_bytes / 1024, self._filtro.taxa_estimada(),
+            time.perf_counter() - inicio,
+        )
+
+    def pode_conter(self, cpf: str) -> bool:
+        """
+        Returns:
+            bool: False se o CPF certamente não está cadastrado
+        """
+        if self._filtro is None:
+            return True
+        return _somente_digitos(cpf) in self._filtro
+
+    def adicionar(self, cpf: str) -> None:
+        if self._filtro is None:
+            return
+        self._filtro.adicionar(_somente_digitos(cpf))
+        if self._filtro.itens > self._filtro.capacidade and not self._avisou_capacidade:
+            self._avisou_capacidade = True
+            logger.warning(
+                "⚠️ Filtro de CPFs acima da capacidade (%s); aumente CPF_FILTRO_CAPACIDADE",
+                self._filtro.capacidade,
+            )
+
+
+# Instância compartilhada
+cpf_filter = CPFFilter()
@@ -0,0 +1,141 @@
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+from markupsafe import Markup
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+_BLOCO_HTML = re.compile(r"({%-?\s*block\s+\w*html\s*-?%})(.*?)({%-?\s*endblock\s*-?%})", re.S)
+
+
+def minificar_html(trecho: str) -> str:
+    trecho = re.sub(r">\s+<", "><", trecho)
+    return re.sub(r"\s+", " ", trecho).strip()
+
+
+def minificar_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+class MinifyingLoader(FileSystemLoader):
+    """
+    Carrega templates minificando os blocos cujo nome termina em ``html``
+    antes da compilação. Blocos de texto puro ficam intactos.
+    """
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        source = _BLOCO_HTML.sub(
+            lambda m: m.group(1) + minificar_html(m.group(2)) + m.group(3),
+            source
+        )
+        return source, filename, uptodate
+
+
+class EmailTemplateRenderer:
+    """
+    Renderiza os e-mails de contrato a partir de templates Jinja2.
+
+    Os templates são compilados uma única vez na criação da instância, com o
+    HTML e o CSS já minificados; o CSS entra no template como constante
+    global. O trecho que depende apenas do plano (nome e valor) é
+    renderizado uma vez por plano e memoizado, e as versões HTML e texto
+    puro saem de blocos do mesmo template compilado.
+    """
+
+    CONTRATO_ASSINADO = "contrato_assinado.jinja"
+    CONTRATOS_ASSINADOS_LOTE = "contratos_assinados_lote.jinja"
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR, plan_cache_size: int = 256):
+        self.env = Environment(
+            loader=MinifyingLoader(str(templates_dir)),
+            autoescape=select_autoescape(["html", "jinja"]),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            undefined=StrictUndefined,
+            auto_reload=False,
+        )
+        css = (templates_dir / "estilo.css").read_text(encoding="utf-8")
+        self.env.globals["estilo_css"] = Markup(minificar_css(css))
+
+        self._contrato_assinado = self.env.get_template(self.CONTRATO_ASSINADO)
+        self._contratos_lote = self.env.get_template(self.CONTRATOS_ASSINADOS_LOTE)
+        self._render_plano = lru_cache(maxsize=plan_cache_size)(self._render_plano_sem_cache)
+
+    def render_contrato_assinado(
+        self,
+        to_name: str,
+        contract_number: str,
+        plan_name: str,
+        plan_value: str,
+        download_url: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """
+        Renderiza o e-mail de contrato assinado.
+        
+        Com ``download_url`` o texto aponta para o link em vez do anexo.
+
+        Returns:
+            Tuple[str, str]: Corpo HTML e corpo em texto puro
+        """
+        plano_html, plano_texto = self._render_plano(plan_name, plan_value)
+        context = self._contrato_assinado.new_context({
+            "first_name": to_name.split()[0],
+            "to_name": to_name,
+            "contract_number": contract_number,
+            "plano_html": plano_html,
+            "plano_texto": plano_texto,
+            "download_url": download_url,
+        })
+        html = self._render_block("html", context)
+        texto = self._render_block("texto", context)
+        return html, texto
+
+    def render_contratos_assinados(self, to_name: str, contratos: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        Renderiza o e-mail com vários contratos para o mesmo destinatário.
+        
+        Args:
+            to_name: Nome do destinatário
+            contratos: Dicts com contract_number, plan_name, plan_value e
+                download_url (opcional)
+        
+        Returns:
+            Tuple[str, str]: Corpo HTML e corpo em texto puro
+        """
+        itens = []
+        for contrato in contratos:
+            plano_html, plano_texto = self._render_plano(contrato["plan_name"], contrato["plan_value"])
+            itens.append({
+                "contract_number": contrato["contract_number"],
+                "download_url": contrato.get("download_url"),
+                "plano_html": plano_html,
+                "plano_texto": plano_texto,
+            })
+        context = self._contratos_lote.new_context({
+            "first_name": to_name.split()[0],
+            "to_name": to_name,
+            "contratos": itens,
+        })
+        html = "".join(self._contratos_lote.blocks["html"](context)).strip()
+        texto = "".join(self._contratos_lote.blocks["texto"](context)).strip()
+        return html, texto
+
+    def _render_plano_sem_cache(self, plan_name: str, plan_value: str) -> Tuple[Markup, str]:
+        context = self._contrato_assinado.new_context({
+            "plan_name": plan_name,
+            "plan_value": plan_value,
+        })
+        return Markup(self._render_block("plano_html", context)), self._render_block("plano_texto", context)
+
+    def _render_block(self, nome: str, context) -> str:
+        return "".join(self._contrato_assinado.blocks[nome](context)).strip()
+
+
+email_templates = EmailTemplateRenderer()
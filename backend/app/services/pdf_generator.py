@@ -6,14 +6,25 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
 from datetime import datetime
 import os
+import uuid
 
 class PDFGenerator:
     """
     Gerador de PDFs de contratos com design profissional.
+    
+    No modo compacto (padrão; PDF_MODO_COMPACTO=0 desativa):
+    - os content streams são comprimidos (pageCompression)
+    - a saída é reprodutível (invariant): data de criação fixa nos metadados
+      e ID do documento derivado dos metadados do contrato (título, assunto),
+      de modo que entradas iguais geram arquivos idênticos byte a byte
+    
+    As fontes usadas são as Type 1 padrão (Helvetica), que não são embutidas
+    no arquivo; por isso não há subsetting a fazer.
     """
     
     def __init__(self):
         self.contracts_dir = "contracts"
+        self.compact = os.getenv("PDF_MODO_COMPACTO", "1") == "1"
         os.makedirs(self.contracts_dir, exist_ok=True)
     
     def gerar_contrato(self, cliente, contrato):
@@ -29,15 +40,25 @@ class PDFGenerator:
         """
         filename = f"{contrato.numero_contrato}.pdf"
         filepath = os.path.join(self.contracts_dir, filename)
+        # O PDF é escrito em um arquivo temporário no mesmo diretório e
+        # movido para o lugar no fim: quem baixa ou anexa o contrato durante
+        # uma nova renderização vê o arquivo antigo ou o novo, nunca um
+        # arquivo pela metade
+        temporario = os.path.join(self.contracts_dir, f".{filename}.{uuid.uuid4().hex}.tmp")
         
         # Criar documento
         doc = SimpleDocTemplate(
-            filepath,
+            temporario,
             pagesize=A4,
             rightMargin=2*cm,
             leftMargin=2*cm,
             topMargin=2*cm,
-            bottomMargin=2*cm
+            bottomMargin=2*cm,
+            title=f"Contrato {contrato.numero_contrato}",
+            subject=f"{contrato.plano_nome} - {contrato.plano_valor}",
+            author="Sistema de Contratos",
+            pageCompression=1 if self.compact else None,
+            invariant=1 if self.compact else None,
         )
         
         # Estilos
@@ -84,7 +105,9 @@ class PDFGenerator:
         story.append(Spacer(1, 0.5*cm))
         
         # Informações do contrato
-        data_atual = datetime.now().strftime("%d/%m/%Y")
+        # Data do contrato (não a da renderização), para que regerar o PDF
+        # produza o mesmo documento
+        data_atual = (contrato.criado_em or datetime.now()).strftime("%d/%m/%Y")
         info_text = f"<b>Data de Emissão:</b> {data_atual}<br/>"
         info_text += f"<b>Plano Contratado:</b> {contrato.plano_nome}<br/>"
         info_text += f"<b>Valor:</b> {contrato.plano_valor}"
@@ -207,7 +230,13 @@ class PDFGenerator:
         story.append(Paragraph("Contratante", assinatura_style))
         
         # Gerar PDF
-        doc.build(story)
+        try:
+            doc.build(story)
+            os.replace(temporario, filepath)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
         
         return filepath
 
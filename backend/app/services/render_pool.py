@@ -0,0 +1,71 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from app.services.pdf_generator import PDFGenerator
+
+_executor: Optional[ProcessPoolExecutor] = None
+_generator: Optional[PDFGenerator] = None
+
+
+def snapshot(obj: Any) -> Dict[str, Any]:
+    """
+    Copia as colunas de um objeto do ORM para um dict serializável, para
+    que possa ser enviado a outro processo.
+    """
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+def render_contrato(dados_cliente: Dict[str, Any], dados_contrato: Dict[str, Any]) -> str:
+    """
+    Renderiza o PDF de um contrato a partir de snapshots (executa no
+    processo do pool).
+
+    Returns:
+        str: Caminho do arquivo PDF gerado
+    """
+    global _generator
+    if _generator is None:
+        _generator = PDFGenerator()
+    return _generator.gerar_contrato(SimpleNamespace(**dados_cliente), SimpleNamespace(**dados_contrato))
+
+
+def _inicializar_worker() -> None:
+    # Ctrl+C chega a todo o grupo de processos; quem encerra o pool é o pai
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Pool de processos compartilhado para renderização de PDFs, criado na
+    primeira utilização. O tamanho vem de RENDER_WORKERS (padrão: número
+    de CPUs). Usa "spawn" para não herdar threads do servidor.
+    """
+    global _executor
+    if _executor is None:
+        workers = int(os.getenv("RENDER_WORKERS", "0")) or os.cpu_count() or 2
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_worker,
+        )
+    return _executor
+
+
+async def render_contrato_async(cliente: Any, contrato: Any) -> str:
+    """
+    Renderiza o contrato no pool de processos sem bloquear o event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), render_contrato, snapshot(cliente), snapshot(contrato))
+
+
+def shutdown(wait: bool = True) -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait, cancel_futures=not wait)
+        _executor = None
@@ -0,0 +1,209 @@
+import os
+import re
+import unicodedata
+from typing import Any, Iterable, List, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models import Cliente
+
+
+def normalizar(texto: str) -> str:
+    """
+    Normaliza texto para busca: remove acentos, converte para minúsculas e
+    colapsa espaços ("João  Ávila" -> "joao avila").
+    """
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.lower().split())
+
+
+def _somente_digitos(texto: str) -> str:
+    return re.sub(r"\D", "", texto)
+
+
+class ClienteSearchIndex:
+    """
+    Índice de busca textual sobre clientes (nome, e-mail, celular, CPF e placa).
+
+    O índice é uma tabela auxiliar ``clientes_busca`` com um documento
+    normalizado por cliente, mantida pelos eventos do ORM em toda inserção,
+    alteração ou exclusão de ``Cliente``.
+
+    - SQLite: tabela virtual FTS5 com tokenizador trigram (rowid = id do cliente),
+      ordenada por bm25. Busca apenas por trecho: todos os termos precisam
+      aparecer no documento, sem tolerância a erros de digitação.
+    - PostgreSQL: tabela comum com índice GIN ``gin_trgm_ops`` (extensão pg_trgm),
+      ordenada por ``word_similarity``. Além dos trechos, encontra documentos
+      com um trecho parecido com a consulta (operador ``<%``), o que tolera
+      erros de digitação ("slva" -> "silva", "perreira" -> "pereira"). A
+      comparação é com o trecho mais parecido do documento, e não com o
+      documento inteiro (nome, e-mail, CPF...), que diluiria a semelhança.
+
+    Em ambos os casos as buscas ("silv", "1234") usam o índice em vez de
+    varrer ``clientes``. Termos com menos de 3 caracteres são ignorados,
+    pois não formam trigramas.
+
+    Configuração (variáveis de ambiente):
+        - BUSCA_LIMIAR_SIMILARIDADE: word_similarity mínima da busca
+          aproximada no PostgreSQL (padrão: 0.4; o padrão do pg_trgm, 0.6,
+          não tolera uma letra a menos em palavras curtas)
+    """
+
+    TABLE = "clientes_busca"
+    MIN_TERM_LENGTH = 3
+
+    def __init__(self):
+        self.limiar_similaridade = float(os.getenv("BUSCA_LIMIAR_SIMILARIDADE", "0.4"))
+
+    def criar(self, engine: Engine) -> None:
+        """
+        Cria a estrutura do índice (se não existir) e o popula a partir de
+        ``clientes`` quando estiver vazio.
+        """
+        with engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                connection.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+                    " cliente_id INTEGER PRIMARY KEY REFERENCES clientes(id) ON DELETE CASCADE,"
+                    " documento TEXT NOT NULL)"
+                ))
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{self.TABLE}_trgm "
+                    f"ON {self.TABLE} USING gin (documento gin_trgm_ops)"
+                ))
+            else:
+                connection.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.TABLE} "
+                    "USING fts5(documento, tokenize='trigram')"
+                ))
+
+            indexados = connection.execute(text(f"SELECT count(*) FROM {self.TABLE}")).scalar()
+            if not indexados:
+                self.reconstruir(connection)
+
+    def reconstruir(self, connection: Connection, batch_size: int = 5000) -> int:
+        """
+        Recria todo o índice a partir da tabela ``clientes``.
+
+        Returns:
+            int: Quantidade de clientes indexados
+        """
+        connection.execute(text(f"DELETE FROM {self.TABLE}"))
+        colunas = ", ".join(c.name for c in self._colunas())
+        resultado = connection.execution_options(yield_per=batch_size).execute(
+            text(f"SELECT id, {colunas} FROM clientes ORDER BY id")
+        )
+
+        total = 0
+        for lote in resultado.partitions():
+            linhas = [
+                {"id": linha.id, "documento": self.documento(linha)}
+                for linha in lote
+            ]
+            connection.execute(self._insert_sql(connection), linhas)
+            total += len(linhas)
+        return total
+
+    def documento(self, cliente: Any) -> str:
+        """
+        Monta o texto indexado de um cliente. CPF, celular e placa entram
+        também sem pontuação para que "52998224725" encontre "529.982.247-25".
+        """
+        partes = [cliente.nome_completo, cliente.email, cliente.celular, cliente.cpf]
+        partes.append(_somente_digitos(cliente.celular))
+        partes.append(_somente_digitos(cliente.cpf))
+        if cliente.placa:
+            partes.append(cliente.placa)
+            partes.append(re.sub(r"[^0-9A-Za-z]", "", cliente.placa))
+        return normalizar(" ".join(p for p in partes if p))
+
+    def indexar(self, connection: Connection, cliente: Any) -> None:
+        self.remover(connection, cliente.id)
+        connection.execute(
+            self._insert_sql(connection),
+            {"id": cliente.id, "documento": self.documento(cliente)}
+        )
+
+    def remover(self, connection: Connection, cliente_id: int) -> None:
+        coluna = "cliente_id" if connection.dialect.name == "postgresql" else "rowid"
+        connection.execute(text(f"DELETE FROM {self.TABLE} WHERE {coluna} = :id"), {"id": cliente_id})
+
+    def buscar(self, db: Session, termo: str, pagina: int, por_pagina: int) -> Tuple[int, List[int]]:
+        """
+        Busca clientes cujo documento contém todos os termos informados
+        ou, no PostgreSQL, tem um trecho similar à consulta (busca aproximada).
+
+        Returns:
+            Tuple[int, List[int]]: Total de resultados e ids da página,
+            do mais relevante para o menos relevante
+        """
+        termos = [t for t in normalizar(termo).split() if len(t) >= self.MIN_TERM_LENGTH]
+        if not termos:
+            return 0, []
+
+        offset = (pagina - 1) * por_pagina
+        if db.get_bind().dialect.name == "postgresql":
+            params = {f"t{i}": f"%{self._escapar_like(t)}%" for i, t in enumerate(termos)}
+            trechos = " AND ".join(f"documento LIKE :t{i} ESCAPE '\\'" for i in range(len(termos)))
+            filtro = f"({trechos}) OR :consulta <% documento"
+            params["consulta"] = " ".join(termos)
+            # Limiar do operador <%, válido só até o fim da transação
+            db.execute(
+                text("SELECT set_config('pg_trgm.word_similarity_threshold', :limiar, true)"),
+                {"limiar": str(self.limiar_similaridade)}
+            )
+            total = db.execute(text(f"SELECT count(*) FROM {self.TABLE} WHERE {filtro}"), params).scalar()
+            ids = db.execute(
+                text(
+                    f"SELECT cliente_id FROM {self.TABLE} WHERE {filtro} "
+                    "ORDER BY word_similarity(:consulta, documento) DESC, cliente_id "
+                    "LIMIT :limite OFFSET :offset"
+                ),
+                {**params, "limite": por_pagina, "offset": offset}
+            ).scalars().all()
+        else:
+            consulta = " ".join('"' + t.replace('"', '""') + '"' for t in termos)
+            total = db.execute(
+                text(f"SELECT count(*) FROM {self.TABLE} WHERE {self.TABLE} MATCH :consulta"),
+                {"consulta": consulta}
+            ).scalar()
+            ids = db.execute(
+                text(
+                    f"SELECT rowid FROM {self.TABLE} WHERE {self.TABLE} MATCH :consulta "
+                    "ORDER BY rank LIMIT :limite OFFSET :offset"
+                ),
+                {"consulta": consulta, "limite": por_pagina, "offset": offset}
+            ).scalars().all()
+        return total, list(ids)
+
+    def _insert_sql(self, connection: Connection):
+        if connection.dialect.name == "postgresql":
+            return text(f"INSERT INTO {self.TABLE} (cliente_id, documento) VALUES (:id, :documento)")
+        return text(f"INSERT INTO {self.TABLE} (rowid, documento) VALUES (:id, :documento)")
+
+    @staticmethod
+    def _colunas() -> Iterable:
+        return (Cliente.nome_completo, Cliente.email, Cliente.celular, Cliente.cpf, Cliente.placa)
+
+    @staticmethod
+    def _escapar_like(termo: str) -> str:
+        return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+cliente_search_index = ClienteSearchIndex()
+
+
+# Manter o índice sincronizado na mesma transação das escritas em Cliente
+@event.listens_for(Cliente, "after_insert")
+@event.listens_for(Cliente, "after_update")
+def _indexar_cliente(mapper, connection, target):
+    cliente_search_index.indexar(connection, target)
+
+
+@event.listens_for(Cliente, "after_delete")
+def _remover_cliente(mapper, connection, target):
+    cliente_search_index.remover(connection, target.id)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
 class SignatureService(ABC):
     """
@@ -40,4 +40,18 @@ class SignatureService(ABC):
             Dict contendo informações sobre o status da assinatura
         """
         pass
-
+    
+    def sign_documents(self, items: List[Tuple[Any, Any, str]]) -> List[Dict[str, Any]]:
+        """
+        Assina vários documentos de uma vez (geração em lote).
+        
+        A implementação padrão assina um a um; implementações podem
+        sobrescrever para agrupar chamadas externas ou notificações.
+        
+        Args:
+            items: Tuplas (client_data, contract_data, pdf_path)
+            
+        Returns:
+            Lista com o resultado de sign_document para cada item, na mesma ordem
+        """
+        return [self.sign_document(client_data, contract_data, pdf_path) for client_data, contract_data, pdf_path in items]
@@ -1,8 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import logging
 from datetime import datetime
 from app.services.signature_interface import SignatureService
 from app.services.email_service import EmailService
+from app.services.task_registry import tarefas
 
 logger = logging.getLogger(__name__)
 
@@ -27,24 +28,15 @@ class SignatureSimulatorService(SignatureService):
         Simula a assinatura de um documento.
         
         Este método:
-        1. Registra o processo de assinatura no log
+        1. Registra o processo de assinatura no log (um registro estruturado)
         2. Simula o envio de e-mail ao cliente
         3. Marca o documento como assinado
         4. Retorna informações sobre o contrato
         """
-        logger.info(f"📝 Iniciando simulação de assinatura para cliente: {client_data.nome_completo}")
-        logger.info(f"📄 Contrato: {contract_data.numero_contrato}")
-        logger.info(f"📧 Simulando envio de e-mail para: {client_data.email}")
-        
-        # Simular processo de assinatura
-        contract_url = f"/contracts/{contract_data.numero_contrato}.pdf"
-        
-        logger.info(f"✅ Documento assinado com sucesso!")
-        logger.info(f"📎 URL do contrato: {contract_url}")
+        resultado = self._sign(client_data, contract_data, pdf_path)
         
         # Enviar e-mail real com o contrato
-        import asyncio
-        asyncio.create_task(
+        tarefas.criar(
             self.email_service.send_contract_email(
                 to_email=client_data.email,
                 to_name=client_data.nome_completo,
@@ -52,9 +44,48 @@ class SignatureSimulatorService(SignatureService):
                 plan_name=contract_data.plano_nome,
                 plan_value=contract_data.plano_valor,
                 pdf_path=pdf_path
-            )
+            ),
+            nome=f"email:{contract_data.numero_contrato}"
         )
         
+        return resultado
+    
+    def sign_documents(self, items: List[Tuple[Any, Any, str]]) -> List[Dict[str, Any]]:
+        """
+        Simula a assinatura de vários documentos e envia um único e-mail
+        por destinatário, com todos os contratos dele anexados.
+        """
+        resultados = []
+        por_destinatario: Dict[str, Tuple[str, List[Dict[str, str]]]] = {}
+        
+        for client_data, contract_data, pdf_path in items:
+            resultados.append(self._sign(client_data, contract_data, pdf_path))
+            _, contratos = por_destinatario.setdefault(client_data.email, (client_data.nome_completo, []))
+            contratos.append({
+                "contract_number": contract_data.numero_contrato,
+                "plan_name": contract_data.plano_nome,
+                "plan_value": contract_data.plano_valor,
+                "pdf_path": pdf_path,
+            })
+        
+        for email, (nome, contratos) in por_destinatario.items():
+            tarefas.criar(self.email_service.send_contracts_email(email, nome, contratos), nome=f"email:{email}")
+        
+        return resultados
+    
+    def _sign(self, client_data: Any, contract_data: Any, pdf_path: str) -> Dict[str, Any]:
+        # Simular processo de assinatura
+        contract_url = f"/contracts/{contract_data.numero_contrato}.pdf"
+        
+        logger.info(
+            "✅ Documento %s assinado (simulação) para %s; e-mail para %s; URL: %s",
+            contract_data.numero_contrato, client_data.nome_completo, client_data.email, contract_url,
+            extra={"contrato": contract_data.numero_contrato, "contract_url": contract_url}
+        )
+        
+        # Codificar o anexo uma única vez, logo após a renderização
+        self.email_service.prepare_attachment(contract_data.numero_contrato, pdf_path)
+        
         return {
             "status": "signed",
             "contract_url": contract_url,
@@ -69,7 +100,7 @@ class SignatureSimulatorService(SignatureService):
         
         No simulador, todas as assinaturas são consideradas concluídas.
         """
-        logger.info(f"🔍 Verificando status da assinatura: {signature_id}")
+        logger.info("🔍 Verificando status da assinatura: %s", signature_id)
         
         return {
             "signature_id": signature_id,
@@ -85,21 +116,8 @@ class SignatureSimulatorService(SignatureService):
         Em produção, este método seria substituído por integração real
         com serviço de e-mail (SendGrid, AWS SES, etc.)
         """
-        logger.info("=" * 80)
-        logger.info("📧 SIMULAÇÃO DE E-MAIL")
-        logger.info("=" * 80)
-        logger.info(f"Para: {client_data.email}")
-        logger.info(f"Assunto: Seu contrato foi assinado com sucesso!")
-        logger.info("-" * 80)
-        logger.info(f"Olá {client_data.nome_completo},")
-        logger.info("")
-        logger.info(f"Seu contrato {contract_data.numero_contrato} foi assinado com sucesso!")
-        logger.info(f"Plano: {contract_data.plano_nome}")
-        logger.info(f"Valor: {contract_data.plano_valor}")
-        logger.info("")
-        logger.info(f"Você pode baixar uma cópia do contrato através do link:")
-        logger.info(f"{contract_url}")
-        logger.info("")
-        logger.info("Obrigado por escolher nossos serviços!")
-        logger.info("=" * 80)
-
+        logger.info(
+            "📧 SIMULAÇÃO DE E-MAIL: contrato %s (%s, %s) para %s <%s>; link: %s",
+            contract_data.numero_contrato, contract_data.plano_nome, contract_data.plano_valor,
+            client_data.nome_completo, client_data.email, contract_url
+        )
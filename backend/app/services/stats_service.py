@@ -0,0 +1,181 @@
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, inspect, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models import Cliente, Contrato, EstatisticaCadastroDiaria, EstatisticaContratoDiaria
+
+# Milhar com separador ("1.299") antes de dígitos corridos ("1299"); com
+# "*" no lugar de "+", "1299" pararia nos três primeiros dígitos
+_VALOR = re.compile(r"(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d{1,2}))?")
+
+
+def parse_valor_centavos(valor: Optional[str]) -> Optional[int]:
+    """
+    Converte um valor de exibição em centavos ("R$ 1.299,90/mês" -> 129990).
+
+    Returns:
+        Optional[int]: Valor em centavos ou None se não houver número
+    """
+    match = _VALOR.search(valor or "")
+    if not match:
+        return None
+    reais = int(match.group(1).replace(".", ""))
+    centavos = int((match.group(2) or "0").ljust(2, "0"))
+    return reais * 100 + centavos
+
+
+class EstatisticasService:
+    """
+    Estatísticas diárias de cadastros e contratos assinados por estado,
+    cidade e plano.
+
+    As tabelas ``estatisticas_*_diarias`` são atualizadas incrementalmente
+    (upsert somando contadores) na mesma transação da escrita que as
+    origina, de modo que o painel lê só os totais consolidados, sem
+    GROUP BY sobre ``clientes``/``contratos``. ``reconstruir`` recalcula
+    tudo a partir das tabelas de origem.
+    """
+
+    def criar(self, engine: Engine) -> None:
+        """
+        Adiciona ``contratos.plano_valor_centavos`` em bancos criados antes
+        da coluna existir (``create_all`` não altera tabelas existentes).
+        """
+        colunas = {coluna["name"] for coluna in inspect(engine).get_columns(Contrato.__tablename__)}
+        if "plano_valor_centavos" not in colunas:
+            with engine.begin() as connection:
+                connection.execute(text(
+                    f"ALTER TABLE {Contrato.__tablename__} ADD COLUMN plano_valor_centavos INTEGER"
+                ))
+
+    def registrar_cadastro(self, db: Session, cliente: Cliente) -> None:
+        """
+        Conta um novo cliente. Não faz commit: deve ser chamado antes do
+        commit que grava o cliente.
+        """
+        self._somar(db, EstatisticaCadastroDiaria, [({
+            # Mesmo relógio do server_default de criado_em (usado em reconstruir)
+            "dia": func.date(func.now()),
+            "estado": cliente.estado,
+            "cidade": cliente.cidade,
+        }, {"total": 1})])
+
+    def registrar_contrato_assinado(self, db: Session, cliente: Cliente, contrato: Contrato) -> None:
+        """
+        Conta um contrato assinado e sua receita. Não faz commit: deve ser
+        chamado antes do commit que marca o contrato como assinado.
+        """
+        self.registrar_contratos_assinados(db, [(cliente, contrato)])
+
+    def registrar_contratos_assinados(self, db: Session, assinados: List[Tuple[Cliente, Contrato]]) -> None:
+        """
+        Conta vários contratos assinados (ex.: um lote) em um único upsert,
+        somando antes os que caem na mesma linha de estatística.
+        """
+        linhas: Dict[Tuple[Any, ...], Dict[str, int]] = {}
+        for cliente, contrato in assinados:
+            dia = contrato.assinado_em.date() if contrato.assinado_em else date.today()
+            soma = linhas.setdefault(
+                (dia, cliente.estado, cliente.cidade, contrato.plano_nome),
+                {"total": 0, "receita_centavos": 0},
+            )
+            soma["total"] += 1
+            soma["receita_centavos"] += contrato.plano_valor_centavos or 0
+
+        self._somar(db, EstatisticaContratoDiaria, [
+            (dict(zip(("dia", "estado", "cidade", "plano_nome"), chave)), soma)
+            for chave, soma in linhas.items()
+        ])
+
+    def _somar(self, db: Session, model: Any, linhas: List[Tuple[Dict[str, Any], Dict[str, int]]]) -> None:
+        """
+        Soma ``incrementos`` às linhas de ``model`` identificadas por
+        ``chave``, criando as que não existem. As chaves devem ser distintas.
+        """
+        if not linhas:
+            return
+        table = model.__table__
+        dialeto = db.get_bind().dialect.name
+
+        if dialeto in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialeto == "sqlite" else postgresql.insert
+            stmt = insert(table).values([{**chave, **incrementos} for chave, incrementos in linhas])
+            chave, incrementos = linhas[0]
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(chave),
+                set_={coluna: table.c[coluna] + stmt.excluded[coluna] for coluna in incrementos},
+            )
+            db.execute(stmt)
+            return
+
+        # Outros bancos: tenta atualizar e insere se a linha ainda não existe
+        for chave, incrementos in linhas:
+            resultado = db.execute(
+                update(table)
+                .where(*(table.c[coluna] == valor for coluna, valor in chave.items()))
+                .values({coluna: table.c[coluna] + valor for coluna, valor in incrementos.items()})
+            )
+            if resultado.rowcount == 0:
+                db.execute(table.insert().values(**chave, **incrementos))
+
+    def reconstruir(self, connection: Connection) -> Dict[str, int]:
+        """
+        Recalcula as estatísticas a partir de ``clientes`` e ``contratos``,
+        recalculando antes ``plano_valor_centavos`` a partir de ``plano_valor``
+        onde estiver vazio ou divergente.
+
+        Returns:
+            Dict[str, int]: Linhas geradas por tabela e contratos atualizados
+        """
+        pendentes = []
+        for contrato_id, plano_valor, atual in connection.execute(
+            select(Contrato.id, Contrato.plano_valor, Contrato.plano_valor_centavos)
+        ):
+            centavos = parse_valor_centavos(plano_valor)
+            if centavos != atual:
+                pendentes.append((contrato_id, centavos))
+        for contrato_id, centavos in pendentes:
+            connection.execute(
+                update(Contrato.__table__)
+                .where(Contrato.id == contrato_id)
+                .values(plano_valor_centavos=centavos)
+            )
+
+        cadastros = EstatisticaCadastroDiaria.__table__
+        contratos = EstatisticaContratoDiaria.__table__
+        connection.execute(delete(cadastros))
+        connection.execute(delete(contratos))
+
+        dia_cadastro = func.date(Cliente.criado_em)
+        connection.execute(cadastros.insert().from_select(
+            ["dia", "estado", "cidade", "total"],
+            select(dia_cadastro, Cliente.estado, Cliente.cidade, func.count())
+            .group_by(dia_cadastro, Cliente.estado, Cliente.cidade)
+        ))
+
+        dia_assinatura = func.date(Contrato.assinado_em)
+        connection.execute(contratos.insert().from_select(
+            ["dia", "estado", "cidade", "plano_nome", "total", "receita_centavos"],
+            select(
+                dia_assinatura, Cliente.estado, Cliente.cidade, Contrato.plano_nome,
+                func.count(), func.coalesce(func.sum(Contrato.plano_valor_centavos), 0)
+            )
+            .join(Cliente, Cliente.id == Contrato.cliente_id)
+            .where(Contrato.status == "assinado", Contrato.assinado_em.is_not(None))
+            .group_by(dia_assinatura, Cliente.estado, Cliente.cidade, Contrato.plano_nome)
+        ))
+
+        return {
+            "contratos_atualizados": len(pendentes),
+            "cadastros": connection.execute(select(func.count()).select_from(cadastros)).scalar(),
+            "contratos": connection.execute(select(func.count()).select_from(contratos)).scalar(),
+        }
+
+
+# Instância compartilhada
+estatisticas = EstatisticasService()
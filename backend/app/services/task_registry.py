@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import os
+from typing import Coroutine, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TaskRegistry:
+    """
+    Registro das tarefas em segundo plano disparadas pelas requisições
+    (ex.: envio de e-mails após a assinatura).
+
+    Mantém referência forte a cada tarefa (o event loop guarda apenas
+    referências fracas, e uma tarefa sem dono pode ser coletada antes de
+    terminar), registra no log as que falharem e permite que o
+    encerramento do servidor aguarde as pendentes em vez de descartá-las.
+
+    Configuração (variáveis de ambiente):
+        - TAREFAS_TIMEOUT_DRENAGEM: segundos de espera no encerramento (padrão: 20)
+    """
+
+    def __init__(self):
+        self.timeout_drenagem = float(os.getenv("TAREFAS_TIMEOUT_DRENAGEM", "20"))
+        self._tarefas: Set[asyncio.Task] = set()
+
+    def criar(self, coro: Coroutine, nome: Optional[str] = None) -> asyncio.Task:
+        """
+        Agenda ``coro`` no event loop atual e registra a tarefa.
+        """
+        tarefa = asyncio.create_task(coro, name=nome)
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._concluir)
+        return tarefa
+
+    def _concluir(self, tarefa: asyncio.Task) -> None:
+        self._tarefas.discard(tarefa)
+        if not tarefa.cancelled() and tarefa.exception() is not None:
+            logger.error(
+                "❌ Tarefa em segundo plano %s falhou: %s",
+                tarefa.get_name(), tarefa.exception(), exc_info=tarefa.exception(),
+            )
+
+    @property
+    def pendentes(self) -> int:
+        return len(self._tarefas)
+
+    async def drenar(self, timeout: Optional[float] = None) -> None:
+        """
+        Aguarda as tarefas pendentes por até ``timeout`` segundos e cancela
+        as que não terminarem.
+        """
+        if not self._tarefas:
+            return
+
+        timeout = self.timeout_drenagem if timeout is None else timeout
+        logger.info("⏳ Aguardando %s tarefas em segundo plano (até %ss)", len(self._tarefas), timeout)
+        _, atrasadas = await asyncio.wait(set(self._tarefas), timeout=timeout)
+        for tarefa in atrasadas:
+            tarefa.cancel()
+        if atrasadas:
+            await asyncio.wait(atrasadas)
+            logger.warning("⚠️ %s tarefas em segundo plano canceladas no encerramento", len(atrasadas))
+
+
+# Instância compartilhada
+tarefas = TaskRegistry()
@@ -0,0 +1,37 @@
+import mimetypes
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.middleware.compression import negotiate_encoding
+
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles que serve a versão pré-comprimida de um arquivo
+    (``arquivo.br`` ou ``arquivo.gz`` ao lado do original) quando ela existe
+    e o cliente aceita a codificação, sem comprimir nada por requisição.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, tuple(PRECOMPRESSED_SUFFIXES))
+
+        if encoding is not None:
+            try:
+                response = await super().get_response(path + PRECOMPRESSED_SUFFIXES[encoding], scope)
+            except HTTPException:
+                response = None
+            if response is not None and response.status_code in (200, 304):
+                media_type, _ = mimetypes.guess_type(path)
+                response.headers["Content-Type"] = media_type or "application/octet-stream"
+                response.headers["Content-Encoding"] = encoding
+                response.headers.add_vary_header("Accept-Encoding")
+                return response
+
+        return await super().get_response(path, scope)
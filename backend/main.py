@@ -1,19 +1,64 @@
+from app.logging_config import configurar_logging
+
+# Configurar logging antes de importar os serviços (que registram logs ao iniciar)
+configurar_logging()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from app.database import engine, Base
+from app.database import engine, Base, READ_AFTER_WRITE_HEADER
 from app.routers import cadastro
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.request_id import RequestIdMiddleware
+from app.staticfiles import PrecompressedStaticFiles
+from app.services.search_index import cliente_search_index
+from app.services.stats_service import estatisticas
+from app.services.cpf_filter import cpf_filter
+from app.services.change_feed import change_feed, webhook_dispatcher
+from app.services.task_registry import tarefas
+from app.services import render_pool
 import os
 
 # Criar tabelas no banco de dados
 Base.metadata.create_all(bind=engine)
+estatisticas.criar(engine)
+
+# Criar/popular índice de busca de clientes
+cliente_search_index.criar(engine)
+
+# Carregar filtro de CPFs cadastrados (pré-verificação do cadastro)
+cpf_filter.carregar(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Entrega do feed de eventos por webhook (somente com EVENTOS_WEBHOOK_URL)
+    webhook_dispatcher.iniciar()
+    yield
+    # Encerramento: o servidor já concluiu as requisições em andamento;
+    # aguardar os e-mails pendentes e as renderizações no pool
+    change_feed.encerrar()
+    await webhook_dispatcher.parar()
+    await tarefas.drenar()
+    render_pool.shutdown(wait=True)
 
 app = FastAPI(
     title="Sistema de Cadastro e Contratos",
     description="API para cadastro de clientes e geração de contratos",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Comprimir respostas (gzip/brotli) acima de COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# Limitar taxa e concorrência por cliente (adicionado antes do CORS para
+# que as respostas 429/503 também recebam os cabeçalhos CORS)
+app.add_middleware(RateLimitMiddleware)
+
+# Id de requisição para os logs (X-Request-ID)
+app.add_middleware(RequestIdMiddleware)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,13 +66,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lido pelo frontend para manter read-your-writes (ver app/database.py)
+    expose_headers=[READ_AFTER_WRITE_HEADER],
 )
 
 # Criar diretório de contratos se não existir
 os.makedirs("contracts", exist_ok=True)
 
-# Servir arquivos estáticos (PDFs)
-app.mount("/contracts", StaticFiles(directory="contracts"), name="contracts")
+# Servir arquivos estáticos (PDFs), usando versões .br/.gz quando existirem
+app.mount("/contracts", PrecompressedStaticFiles(directory="contracts"), name="contracts")
 
 # Incluir routers
 app.include_router(cadastro.router, prefix="/api", tags=["cadastro"])
@@ -0,0 +1,84 @@
+"""
+Configuração dos testes (no diretório backend: python -m pytest)
+
+A aplicação é importada com um banco SQLite e um diretório de trabalho
+temporários (os PDFs são gravados em ./contracts), sem réplicas de
+leitura e sem limite de requisições.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+
+_DIRETORIO = tempfile.mkdtemp(prefix="testes-cadastro-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DIRETORIO, 'testes.db')}"
+os.environ["DATABASE_READ_URLS"] = ""
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.chdir(_DIRETORIO)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from main import app  # noqa: E402
+
+CLIENTE_BASE = {
+    "nome_completo": "Maria de Souza",
+    "email": "maria@example.com",
+    "celular": "(11) 98765-4321",
+    "cep": "01310-100",
+    "logradouro": "Avenida Paulista",
+    "numero": "1000",
+    "bairro": "Bela Vista",
+    "cidade": "São Paulo",
+    "estado": "SP",
+}
+
+_proximo_cpf = iter(range(100_000_000, 999_999_999))
+
+
+def gerar_cpf() -> str:
+    """CPF válido e ainda não usado nesta execução."""
+    digitos = [int(d) for d in str(next(_proximo_cpf))]
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        digitos.append(soma * 10 % 11 % 10)
+    cpf = "".join(map(str, digitos))
+    return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    # O "with" executa o lifespan (encerra o pool de renderização no fim)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def criar_cliente(client):
+    def criar() -> int:
+        response = client.post("/api/clientes", json={**CLIENTE_BASE, "cpf": gerar_cpf()})
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    return criar
+
+
+@contextmanager
+def registrar_sql() -> Iterator[List[str]]:
+    """Coleta os comandos SQL executados no banco dentro do bloco."""
+    comandos: List[str] = []
+
+    def anotar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+
+    event.listen(engine, "before_cursor_execute", anotar)
+    try:
+        yield comandos
+    finally:
+        event.remove(engine, "before_cursor_execute", anotar)
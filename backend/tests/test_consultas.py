@@ -0,0 +1,51 @@
+"""
+Número de comandos SQL por requisição: leituras não podem crescer com a
+quantidade de objetos carregados (N+1).
+"""
+from conftest import registrar_sql
+
+
+def _selects(comandos):
+    return [comando for comando in comandos if comando.lstrip().upper().startswith("SELECT")]
+
+
+def test_contrato_completo_em_uma_consulta(client, criar_cliente):
+    cliente_id = criar_cliente()
+    contrato = client.post("/api/contratos/gerar", json={"cliente_id": cliente_id}).json()
+
+    with registrar_sql() as comandos:
+        response = client.get(f"/api/contratos/{contrato['id']}/completo")
+    assert response.status_code == 200
+    assert response.json()["cliente"]["id"] == cliente_id
+    assert len(comandos) == 1
+
+    with registrar_sql() as comandos:
+        response = client.get(f"/api/contratos/{contrato['id']}/completo?campos_cliente=nome_completo,email")
+    assert response.status_code == 200
+    assert set(response.json()["cliente"]) == {"nome_completo", "email"}
+    assert len(comandos) == 1
+
+
+def test_lote_com_consultas_constantes(client, criar_cliente):
+    def gerar_lote(quantidade):
+        itens = [{"cliente_id": criar_cliente()} for _ in range(quantidade)]
+        with registrar_sql() as comandos:
+            response = client.post("/api/contratos/lote", json={"itens": itens})
+        assert response.status_code == 200
+        assert response.json()["sucesso"] == quantidade
+        return comandos
+
+    pequeno = gerar_lote(2)
+    grande = gerar_lote(8)
+
+    assert len(_selects(grande)) == len(_selects(pequeno))
+
+    # No SQLite o ORM grava cada contrato e cada evento novo com um INSERT
+    # próprio (sem INSERT em lote com RETURNING); todo o resto é constante
+    def sem_inserts_por_linha(comandos):
+        return [
+            comando for comando in comandos
+            if not comando.startswith(("INSERT INTO contratos ", "INSERT INTO eventos "))
+        ]
+
+    assert len(sem_inserts_por_linha(grande)) == len(sem_inserts_por_linha(pequeno))
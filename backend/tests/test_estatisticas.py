@@ -0,0 +1,18 @@
+import pytest
+
+from app.services.stats_service import parse_valor_centavos
+
+
+@pytest.mark.parametrize("valor, centavos", [
+    ("99,90", 9990),
+    ("1.299,90", 129990),
+    ("1299,90", 129990),
+    ("1299", 129900),
+    ("R$ 12345,00", 1234500),
+    ("R$ 1.299,90/mês", 129990),
+    ("R$ 5,5", 550),
+    ("sob consulta", None),
+    (None, None),
+])
+def test_parse_valor_centavos(valor, centavos):
+    assert parse_valor_centavos(valor) == centavos
@@ -0,0 +1,36 @@
+"""
+Geração de contratos em lote: falhas de um item não derrubam o lote.
+"""
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.database import RoutingSession, engine
+from app.models import Contrato
+
+
+def test_lote_com_numero_gravado_em_paralelo(client, criar_cliente):
+    ids = [criar_cliente() for _ in range(3)]
+    numero = f"CTR-{datetime.now().strftime('%Y%m%d')}-{ids[1]:04d}"
+
+    # Simula outra requisição gravando o contrato do segundo cliente depois
+    # da verificação de números do lote e antes do INSERT
+    def gravar_em_paralelo(session, flush_context, instances):
+        with engine.begin() as connection:
+            connection.execute(Contrato.__table__.insert().values(
+                cliente_id=ids[1], numero_contrato=numero, plano_nome="Plano Premium",
+                plano_valor="R$ 99,90/mês", status="pendente",
+            ))
+
+    event.listen(RoutingSession, "before_flush", gravar_em_paralelo, once=True)
+    try:
+        response = client.post("/api/contratos/lote", json={"itens": [{"cliente_id": i} for i in ids]})
+    finally:
+        if event.contains(RoutingSession, "before_flush", gravar_em_paralelo):
+            event.remove(RoutingSession, "before_flush", gravar_em_paralelo)
+
+    assert response.status_code == 200
+    resultados = response.json()["resultados"]
+    assert [resultado["sucesso"] for resultado in resultados] == [True, False, True]
+    assert resultados[1]["erro"] == "Já existe contrato para este cliente hoje"
+    assert resultados[1]["contrato"] is None
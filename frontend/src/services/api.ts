@@ -9,6 +9,27 @@ const api = axios.create({
   },
 })
 
+// Read-your-writes com réplicas de leitura: após uma escrita o backend
+// devolve X-Ler-Primario-Ate; reenviá-lo faz as leituras seguintes
+// (revisão, sucesso) irem ao banco primário em vez de uma réplica atrasada
+const LER_PRIMARIO_ATE = 'X-Ler-Primario-Ate'
+
+api.interceptors.response.use((response) => {
+  const ate = response.headers[LER_PRIMARIO_ATE.toLowerCase()]
+  if (ate && typeof window !== 'undefined') {
+    sessionStorage.setItem(LER_PRIMARIO_ATE, ate)
+  }
+  return response
+})
+
+api.interceptors.request.use((config) => {
+  const ate = typeof window !== 'undefined' ? sessionStorage.getItem(LER_PRIMARIO_ATE) : null
+  if (ate && Number(ate) > Date.now() / 1000) {
+    config.headers[LER_PRIMARIO_ATE] = ate
+  }
+  return config
+})
+
 export interface ClienteData {
   nome_completo: string
   cpf: string
@@ -76,6 +97,14 @@ export const apiService = {
     const response = await api.get(`/api/contratos/${id}`)
     return response.data
   },
+
+  // Obter contrato com dados do cliente (uma única requisição)
+  obterContratoCompleto: async (id: number, camposCliente?: string[]) => {
+    const response = await api.get(`/api/contratos/${id}/completo`, {
+      params: camposCliente ? { campos_cliente: camposCliente.join(',') } : undefined,
+    })
+    return response.data
+  },
 }
 
 export default api
\ No newline at end of file
@@ -50,7 +50,12 @@ export interface Contrato {
   arquivo_pdf?: string
   plano_nome: string
   plano_valor: string
+  plano_valor_centavos?: number
   criado_em: string
   assinado_em?: string
 }
 
+
+export interface ContratoComCliente extends Contrato {
+  cliente: Partial<Cliente>
+}